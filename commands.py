@@ -1,15 +1,59 @@
 """Slash command system for the TUI."""
 
+import re
+import sys
 from dataclasses import dataclass
 from typing import Callable, Awaitable, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from tui import VirtualAgentApp
 
-REGISTRY: dict[str, "CommandInfo"] = {}
+class _Registry(dict):
+    """Command name -> CommandInfo dict that bumps `version` on every mutation."""
 
+    version = 0
 
-@dataclass
+    def __setitem__(self, name, info) -> None:
+        super().__setitem__(name, info)
+        self.version += 1
+
+    def __delitem__(self, name) -> None:
+        super().__delitem__(name)
+        self.version += 1
+
+    def pop(self, name, *default):
+        self.version += 1
+        return super().pop(name, *default)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, name, info=None):
+        self.version += 1
+        return super().setdefault(name, info)
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+
+
+REGISTRY: dict[str, "CommandInfo"] = _Registry()
+EMPTY_COMMAND_HINT = "Type /help for available commands."
+_WHITESPACE = re.compile(r"\s+")
+
+_HELP_CACHE: tuple[int, str] | None = None  # (REGISTRY.version, rendered /help text)
+
+
+@dataclass(slots=True)
 class CommandInfo:
     name: str
     handler: Callable[["VirtualAgentApp", str], Awaitable[str | None]]
@@ -20,33 +64,46 @@ class CommandInfo:
 def command(name: str, help: str, usage: str | None = None):
     """Decorator to register a slash command."""
     def decorator(fn: Callable[["VirtualAgentApp", str], Awaitable[str | None]]):
-        REGISTRY[name] = CommandInfo(name, fn, help, usage)
+        if name in REGISTRY and REGISTRY[name].handler is not fn:
+            raise RuntimeError(f"Duplicate command: /{name}")
+        key = sys.intern(name)
+        REGISTRY[key] = CommandInfo(key, fn, help, usage)
         return fn
     return decorator
 
 
 async def dispatch(app: "VirtualAgentApp", raw_input: str) -> str | None:
     """Parse and execute a slash command. Returns output or None if silent."""
-    content = raw_input[1:].strip()
-    if not content:
-        return "Type /help for available commands."
-
-    parts = content.split(maxsplit=1)
-    cmd_name = parts[0].lower()
-    args = parts[1] if len(parts) > 1 else ""
+    if raw_input == "/":
+        return EMPTY_COMMAND_HINT
 
-    if cmd_name not in REGISTRY:
+    content = raw_input[1:]
+    if content[:1].isspace() or content[-1:].isspace():
+        content = content.strip()
+    if not content:
+        return EMPTY_COMMAND_HINT
+
+    head, _, args = content.partition(" ")
+    # Space is the only printable whitespace, so this catches a tab or newline separator
+    if not head.isprintable():
+        sep = _WHITESPACE.search(content)
+        if sep is not None:
+            head, args = content[:sep.start()], content[sep.end():]
+    cmd_name = head.lower()
+    args = args.lstrip()
+
+    info = REGISTRY.get(cmd_name)
+    if info is None:
         return f"Unknown command: /{cmd_name}. Type /help for available commands."
 
-    return await REGISTRY[cmd_name].handler(app, args)
+    return await info.handler(app, args)
 
 
 # ─────────────────────────────────────────────────────────────
 # Built-in Commands
 # ─────────────────────────────────────────────────────────────
 
-@command("help", help="List available commands")
-async def cmd_help(app: "VirtualAgentApp", args: str) -> str:
+def _render_help() -> str:
     lines = ["**Available commands:**", ""]
     for name, info in sorted(REGISTRY.items()):
         usage = info.usage or f"/{name}"
@@ -67,6 +124,15 @@ async def cmd_help(app: "VirtualAgentApp", args: str) -> str:
     return "\n".join(lines)
 
 
+@command("help", help="List available commands")
+async def cmd_help(app: "VirtualAgentApp", args: str) -> str:
+    global _HELP_CACHE
+    # Keyed on the registry version, so direct edits to REGISTRY are picked up too
+    if _HELP_CACHE is None or _HELP_CACHE[0] != REGISTRY.version:
+        _HELP_CACHE = (REGISTRY.version, _render_help())
+    return _HELP_CACHE[1]
+
+
 @command("clear", help="Save conversation and start fresh")
 async def cmd_clear(app: "VirtualAgentApp", args: str) -> str | None:
     await app.action_clear()
@@ -114,7 +180,7 @@ async def cmd_files(app: "VirtualAgentApp", args: str) -> str:
         return "Virtual filesystem is empty."
 
     lines = ["**Virtual filesystem:**", ""]
-    for path in sorted(files.keys()):
+    for path in files.sorted_paths():
         size = len(files[path])
         lines.append(f"- `{path}` ({size} chars)")
     return "\n".join(lines)
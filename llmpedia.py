@@ -9,18 +9,28 @@ Environment variables:
     GOOGLE_API_KEY: For Gemini embeddings (semantic search)
 """
 
+import asyncio
+import atexit
 import os
+import threading
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
-import psycopg2
+import httpx
+from psycopg2 import InterfaceError, OperationalError
+from psycopg2.pool import ThreadedConnectionPool
 import requests
 from dotenv import load_dotenv
-from google import genai
 from pydantic_ai import RunContext
 
 from virtual_agent import AgentDeps
 
+if TYPE_CHECKING:
+    from google import genai
+
 load_dotenv()
 
 DB_CONFIG = {
@@ -32,6 +42,7 @@ DB_CONFIG = {
 }
 EMBEDDING_MODEL = "gemini-embedding-001"
 S3_BASE = "https://arxiv-md.s3.amazonaws.com"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 RESOLUTION_TOKENS = {
     "low": 500,
@@ -40,18 +51,126 @@ RESOLUTION_TOKENS = {
 }
 
 
-def _get_connection():
-    return psycopg2.connect(**DB_CONFIG)
+_POOL: ThreadedConnectionPool | None = None
+_POOL_LOCK = threading.Lock()
 
 
-def _get_embedding(text: str) -> list[float]:
-    api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENERATIVE_AI_API_KEY")
-    client = genai.Client(api_key=api_key)
-    response = client.models.embed_content(
+def _get_pool() -> ThreadedConnectionPool:
+    """Create the connection pool on first use (keeps imports DB-free)."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadedConnectionPool(minconn=1, maxconn=8, **DB_CONFIG)
+                atexit.register(_POOL.closeall)
+    return _POOL
+
+
+# Pooled connections that already hold the get_summ prepared statement
+_SUMMARIES_PREPARED = weakref.WeakSet()
+
+PREPARE_SUMMARIES_SQL = """
+    PREPARE get_summ (text[], int) AS
+    SELECT DISTINCT ON (arxiv_code) arxiv_code, summary
+    FROM summary_notes
+    WHERE arxiv_code = ANY($1)
+    ORDER BY arxiv_code, ABS(tokens - $2)
+"""
+
+
+@contextmanager
+def _get_connection():
+    """Borrow a pooled connection, returning it to the pool when done."""
+    pool = _get_pool()
+    conn = pool.getconn()
+    if not conn.autocommit:
+        # Read-only queries: nothing should sit idle, or aborted, in a transaction in the pool
+        conn.autocommit = True
+    broken = False
+    try:
+        yield conn
+    except (OperationalError, InterfaceError):
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+_GENAI_CLIENT: "genai.Client | None" = None
+_GENAI_LOCK = threading.Lock()
+
+
+def _get_genai_client() -> "genai.Client":
+    """Reuse one Gemini client (and its HTTP session) across calls."""
+    global _GENAI_CLIENT
+    if _GENAI_CLIENT is None:
+        with _GENAI_LOCK:
+            if _GENAI_CLIENT is None:
+                from google import genai  # Deferred: heavy SDK, only needed for semantic search
+                api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENERATIVE_AI_API_KEY")
+                _GENAI_CLIENT = genai.Client(api_key=api_key)
+    return _GENAI_CLIENT
+
+
+def _get_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed several texts in a single RPC."""
+    response = _get_genai_client().models.embed_content(
         model=EMBEDDING_MODEL,
-        contents=text
+        contents=texts
     )
-    return response.embeddings[0].values
+    return [embedding.values for embedding in response.embeddings]
+
+
+@lru_cache(maxsize=512)
+def _embed_cached(text: str) -> tuple[float, ...]:
+    return tuple(_get_embeddings([text])[0])
+
+
+def _get_embedding(text: str) -> list[float]:
+    return list(_embed_cached(text))
+
+
+SEMANTIC_SEARCH_SQL = """
+    SELECT d.arxiv_code, d.title, d.authors, d.published, d.summary,
+           1 - (e.embedding <=> %s::vector) as similarity
+    FROM arxiv_details d
+    JOIN arxiv_embeddings_3072 e ON d.arxiv_code = e.arxiv_code
+    WHERE e.doc_type = 'template' AND e.embedding_type = 'gemini'
+"""
+
+FILTER_SEARCH_SQL = """
+    SELECT d.arxiv_code, d.title, d.authors, d.published, d.summary,
+           NULL as similarity
+    FROM arxiv_details d
+    WHERE 1=1
+"""
+
+# Optional search_papers filters, in bitmask order
+SEARCH_CONDITIONS = (
+    "d.title ILIKE %s",
+    "d.summary ILIKE %s",
+    "d.authors ILIKE %s",
+    "d.published >= %s",
+    "d.published <= %s",
+)
+_SEMANTIC_BIT = 1 << len(SEARCH_CONDITIONS)
+_SEARCH_SQL_CACHE: dict[int, str] = {}
+
+
+def _search_sql(mask: int) -> str:
+    """Build (once) the SQL for a given combination of active filters."""
+    sql = _SEARCH_SQL_CACHE.get(mask)
+    if sql is None:
+        semantic = mask & _SEMANTIC_BIT
+        sql = SEMANTIC_SEARCH_SQL if semantic else FILTER_SEARCH_SQL
+        conditions = [c for bit, c in enumerate(SEARCH_CONDITIONS) if mask & (1 << bit)]
+        if conditions:
+            sql += " AND " + " AND ".join(conditions)
+        # Order by raw distance so pgvector can serve top-K from its index
+        sql += " ORDER BY e.embedding <=> %s::vector" if semantic else " ORDER BY d.published DESC"
+        sql += " LIMIT %s"
+        _SEARCH_SQL_CACHE[mask] = sql
+    return sql
 
 
 def search_papers(
@@ -81,71 +200,39 @@ def search_papers(
         List of paper dicts with arxiv_code, title, authors, published, abstract.
         If semantic search, includes similarity score.
     """
-    conn = _get_connection()
-    cur = conn.cursor()
-
-    conditions = []
+    mask = 0
     params = []
 
     if query:
         embedding = _get_embedding(query)
-        base_query = """
-            SELECT d.arxiv_code, d.title, d.authors, d.published, d.summary,
-                   1 - (e.embedding <=> %s::vector) as similarity
-            FROM arxiv_details d
-            JOIN arxiv_embeddings_3072 e ON d.arxiv_code = e.arxiv_code
-            WHERE e.doc_type = 'template' AND e.embedding_type = 'gemini'
-              AND 1 - (e.embedding <=> %s::vector) >= %s
-        """
-        params = [embedding, embedding, similarity_threshold]
-    else:
-        base_query = """
-            SELECT d.arxiv_code, d.title, d.authors, d.published, d.summary,
-                   NULL as similarity
-            FROM arxiv_details d
-            WHERE 1=1
-        """
-
-    if title_contains:
-        conditions.append("d.title ILIKE %s")
-        params.append(f"%{title_contains}%")
-
-    if abstract_contains:
-        conditions.append("d.summary ILIKE %s")
-        params.append(f"%{abstract_contains}%")
-
-    if author:
-        conditions.append("d.authors ILIKE %s")
-        params.append(f"%{author}%")
-
-    if published_after:
-        conditions.append("d.published >= %s")
-        params.append(published_after)
-
-    if published_before:
-        conditions.append("d.published <= %s")
-        params.append(published_before)
-
-    sql = base_query
-    if conditions:
-        sql += " AND " + " AND ".join(conditions)
+        mask |= _SEMANTIC_BIT
+        params = [embedding]
+
+    filter_values = (
+        f"%{title_contains}%" if title_contains else None,
+        f"%{abstract_contains}%" if abstract_contains else None,
+        f"%{author}%" if author else None,
+        published_after or None,
+        published_before or None,
+    )
+    for bit, value in enumerate(filter_values):
+        if value is not None:
+            mask |= 1 << bit
+            params.append(value)
 
+    sql = _search_sql(mask)
     if query:
-        sql += " ORDER BY similarity DESC"
-    else:
-        sql += " ORDER BY d.published DESC"
-
-    sql += " LIMIT %s"
+        params.append(embedding)
     params.append(limit)
 
-    cur.execute(sql, params)
-    rows = cur.fetchall()
-
-    cur.close()
-    conn.close()
+    with _get_connection() as conn, conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
 
     results = []
     for row in rows:
+        if row[5] is not None and row[5] < similarity_threshold:
+            continue
         paper = {
             "arxiv_code": row[0],
             "title": row[1],
@@ -179,21 +266,12 @@ def get_summaries(
 
     target_tokens = RESOLUTION_TOKENS.get(resolution, 1000)
 
-    conn = _get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT DISTINCT ON (arxiv_code) arxiv_code, summary, tokens
-        FROM summary_notes
-        WHERE arxiv_code = ANY(%s)
-        ORDER BY arxiv_code, ABS(tokens - %s)
-    """, (arxiv_codes, target_tokens))
-
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    return {row[0]: row[1] for row in rows}
+    with _get_connection() as conn, conn.cursor() as cur:
+        if conn not in _SUMMARIES_PREPARED:
+            cur.execute(PREPARE_SUMMARIES_SQL)
+            _SUMMARIES_PREPARED.add(conn)
+        cur.execute("EXECUTE get_summ (%s, %s)", (arxiv_codes, target_tokens))
+        return {code: summary for code, summary in cur}
 
 
 def download_paper(
@@ -211,39 +289,78 @@ def download_paper(
         Local file path on success, None on failure.
     """
     url = f"{S3_BASE}/{arxiv_code}/paper.md"
-    response = requests.get(url, timeout=30)
-    if response.status_code != 200:
-        return None
+    with requests.get(url, stream=True, timeout=30) as response:
+        if response.status_code != 200:
+            return None
+
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        filepath = Path(output_dir) / f"{arxiv_code}.md"
+        with filepath.open("wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+    return str(filepath)
 
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-    filepath = Path(output_dir) / f"{arxiv_code}.md"
-    filepath.write_text(response.text)
+
+async def _download_paper_async(
+    client: httpx.AsyncClient,
+    arxiv_code: str,
+    output_dir: str
+) -> str | None:
+    async with client.stream("GET", f"{S3_BASE}/{arxiv_code}/paper.md") as response:
+        if response.status_code != 200:
+            return None
+
+        filepath = Path(output_dir) / f"{arxiv_code}.md"
+        # Disk writes run in a worker thread so they don't stall the event loop
+        f = await asyncio.to_thread(filepath.open, "wb")
+        try:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
     return str(filepath)
 
 
+async def download_papers_async(
+    arxiv_codes: list[str],
+    output_dir: str = "workspace/papers",
+    max_connections: int = 5
+) -> dict[str, str | None]:
+    """Async form of download_papers, for callers already inside an event loop."""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        paths = await asyncio.gather(
+            *(_download_paper_async(client, code, output_dir) for code in arxiv_codes)
+        )
+    return dict(zip(arxiv_codes, paths))
+
+
 def download_papers(
     arxiv_codes: list[str],
     output_dir: str = "workspace/papers",
     max_workers: int = 5
 ) -> dict[str, str | None]:
     """
-    Download multiple papers in parallel.
+    Download multiple papers concurrently over one pooled HTTP client.
 
     Args:
         arxiv_codes: List of arxiv codes
         output_dir: Directory to save markdowns
-        max_workers: Thread pool size
+        max_workers: Max concurrent connections
 
     Returns:
         Dict mapping arxiv_code to filepath or None.
-    """
-    def _download(code: str) -> tuple[str, str | None]:
-        return (code, download_paper(code, output_dir))
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        results = list(executor.map(_download, arxiv_codes))
-
-    return dict(results)
+    Raises:
+        RuntimeError: If called from a running event loop (e.g. the TUI);
+            await download_papers_async there instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(download_papers_async(arxiv_codes, output_dir, max_workers))
+    raise RuntimeError("download_papers blocks; inside an event loop, await download_papers_async instead")
 
 
 # ─────────────────────────────────────────────────────────────
@@ -290,14 +407,17 @@ def search_arxiv(
         return "No papers found matching criteria."
 
     lines = [f"Found {len(results)} papers:\n"]
+    append = lines.append
     for paper in results:
-        lines.append(f"[{paper['arxiv_code']}] {paper['title']} ({paper['published']})")
-        lines.append(f"  Authors: {paper['authors'][:80]}...")
+        authors = paper['authors']
+        append(f"[{paper['arxiv_code']}] {paper['title']} ({paper['published']})")
+        append(f"  Authors: {authors if len(authors) <= 80 else authors[:80]}...")
         if paper.get('similarity'):
-            lines.append(f"  Similarity: {paper['similarity']}")
-        if paper.get('abstract'):
-            lines.append(f"  Abstract: {paper['abstract'][:200]}...")
-        lines.append("")
+            append(f"  Similarity: {paper['similarity']}")
+        abstract = paper.get('abstract')
+        if abstract:
+            append(f"  Abstract: {abstract if len(abstract) <= 200 else abstract[:200]}...")
+        append("")
 
     return "\n".join(lines)
 
@@ -347,7 +467,7 @@ def fetch_paper(ctx: RunContext["AgentDeps"], arxiv_code: str) -> str:
     if response.status_code != 200:
         return f"Error: Could not download paper {arxiv_code} (HTTP {response.status_code})"
 
-    content = response.text
+    content = response.content.decode("utf-8", errors="replace")
     path = f"{VIRTUAL_ROOT}/papers/{arxiv_code}.md"
     ctx.deps.fs.write(path, content)
 
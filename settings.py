@@ -1,26 +1,46 @@
 """Minimal settings persistence."""
+from copy import deepcopy
 from pathlib import Path
 import json
 
 SETTINGS_PATH = Path.home() / ".config" / "pyagents" / "settings.json"
 
+# In-memory copy of the settings file, reloaded only when its mtime changes
+_cache: dict | None = None
+_cache_mtime: int | None = None
+
+
+def _cached() -> dict:
+    """The cached settings, reloaded if the file changed. Callers must not mutate it."""
+    global _cache, _cache_mtime
+    try:
+        mtime = SETTINGS_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _cache is None or mtime != _cache_mtime:
+        _cache = json.loads(SETTINGS_PATH.read_bytes())
+        _cache_mtime = mtime
+    return _cache
+
 
 def load() -> dict:
-    """Load all settings."""
-    if SETTINGS_PATH.exists():
-        return json.loads(SETTINGS_PATH.read_text())
-    return {}
+    """Load all settings (a copy; changes persist only through save)."""
+    return deepcopy(_cached())
 
 
 def save(data: dict) -> None:
     """Save all settings."""
+    global _cache, _cache_mtime
     SETTINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
     SETTINGS_PATH.write_text(json.dumps(data, indent=2))
+    _cache = deepcopy(data)
+    _cache_mtime = SETTINGS_PATH.stat().st_mtime_ns
 
 
 def get(key: str, default=None):
     """Get a single setting."""
-    return load().get(key, default)
+    data = _cached()
+    return deepcopy(data[key]) if key in data else default
 
 
 def set(key: str, value) -> None:
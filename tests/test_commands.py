@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from commands import REGISTRY, dispatch, command
+from virtual_agent import VirtualFileSystem
 
 
 @pytest.fixture
@@ -11,8 +12,7 @@ def mock_app():
     app = MagicMock()
     app.action_clear = AsyncMock()
     app.action_save = AsyncMock()
-    app.fs = MagicMock()
-    app.fs.files = {}
+    app.fs = VirtualFileSystem()
     return app
 
 
@@ -33,6 +33,18 @@ class TestDispatch:
         result = await dispatch(mock_app, "/files")
         assert "empty" in result.lower()
 
+    async def test_case_insensitive_name_and_arg_spacing(self, mock_app):
+        mock_app.switch_model = MagicMock(return_value="Switched to gemini")
+        result = await dispatch(mock_app, "/MODEL   gemini")
+        mock_app.switch_model.assert_called_once_with("gemini")
+        assert result == "Switched to gemini"
+
+    @pytest.mark.parametrize("raw", ["/model\tgemini", "/model\ngemini", "/model \t gemini"])
+    async def test_any_whitespace_separates_args(self, mock_app, raw):
+        mock_app.switch_model = MagicMock(return_value="Switched to gemini")
+        assert await dispatch(mock_app, raw) == "Switched to gemini"
+        mock_app.switch_model.assert_called_once_with("gemini")
+
 
 class TestCommandDecorator:
     def test_registers_command(self):
@@ -44,6 +56,15 @@ class TestCommandDecorator:
         assert REGISTRY["_testcmd"].help == "Test command"
         del REGISTRY["_testcmd"]
 
+    async def test_unregistered_command_not_dispatched(self, mock_app):
+        @command("_testcmd4", help="Removed again")
+        async def cmd_test4(app, args):
+            return "ok"
+
+        assert await dispatch(mock_app, "/_testcmd4") == "ok"
+        del REGISTRY["_testcmd4"]
+        assert "Unknown command" in await dispatch(mock_app, "/_testcmd4")
+
     def test_registers_with_usage(self):
         @command("_testcmd2", help="Another test", usage="/testcmd2 <arg>")
         async def cmd_test2(app, args):
@@ -52,6 +73,24 @@ class TestCommandDecorator:
         assert REGISTRY["_testcmd2"].usage == "/testcmd2 <arg>"
         del REGISTRY["_testcmd2"]
 
+    def test_rejects_duplicate_name(self):
+        with pytest.raises(RuntimeError, match="Duplicate command"):
+            @command("help", help="Shadows the builtin")
+            async def cmd_dup(app, args):
+                return "dup"
+
+    async def test_help_reflects_new_registration(self, mock_app):
+        await dispatch(mock_app, "/help")
+
+        @command("_testcmd3", help="Registered after help")
+        async def cmd_test3(app, args):
+            return "ok"
+
+        result = await dispatch(mock_app, "/help")
+        assert "Registered after help" in result
+        del REGISTRY["_testcmd3"]
+        assert "Registered after help" not in await dispatch(mock_app, "/help")
+
 
 class TestBuiltinCommands:
     async def test_clear_calls_action(self, mock_app):
@@ -72,3 +111,10 @@ class TestBuiltinCommands:
         mock_app.fs.files = {"/home/user/test.txt": "content"}
         result = await dispatch(mock_app, "/files")
         assert "test.txt" in result
+
+    async def test_files_sorted_after_mutation(self, mock_app):
+        mock_app.fs.files["/home/user/b.txt"] = "b"
+        await dispatch(mock_app, "/files")
+        mock_app.fs.files["/home/user/a.txt"] = "a"
+        result = await dispatch(mock_app, "/files")
+        assert result.index("a.txt") < result.index("b.txt")
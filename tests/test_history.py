@@ -0,0 +1,145 @@
+"""Tests for the append-only chat history logs."""
+
+import gzip
+
+from pydantic_ai.messages import (
+    ModelRequest, ModelResponse, SystemPromptPart, TextPart, ToolCallPart, ToolReturnPart, UserPromptPart,
+)
+
+import tui
+from tui import (
+    append_chat_history, delete_chat_history, get_session_preview, list_chat_sessions, load_chat_session,
+    window_history,
+)
+
+
+class TestHistoryLog:
+    def test_missing_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tui, "LEGACY_LOG_FILE", tmp_path / "old.jsonl")
+        monkeypatch.setattr(tui, "LEGACY_HISTORY_FILE", tmp_path / "old.json")
+        assert list_chat_sessions(tmp_path / "h") == []
+        assert load_chat_session(tmp_path / "h", "a") == []
+
+    def test_append_and_replay(self, tmp_path):
+        root = tmp_path / "h"
+        append_chat_history(root, "a", 0, [b'{"n":0}', b'{"n":1}'])
+        append_chat_history(root, "a", 2, [b'{"n":2}'])
+        assert list_chat_sessions(root) == ["a"]
+        assert load_chat_session(root, "a") == [b'{"n":0}', b'{"n":1}', b'{"n":2}']
+
+    def test_append_truncates_rewound_messages(self, tmp_path):
+        root = tmp_path / "h"
+        append_chat_history(root, "a", 0, [b'{"n":0}', b'{"n":1}', b'{"n":2}'])
+        append_chat_history(root, "a", 1, [b'{"n":"new"}'])
+        assert load_chat_session(root, "a") == [b'{"n":0}', b'{"n":"new"}']
+
+    def test_delete(self, tmp_path):
+        root = tmp_path / "h"
+        append_chat_history(root, "a", 0, [b'{"n":0}'])
+        append_chat_history(root, "b", 0, [b'{"n":0}'])
+        delete_chat_history(root, "a")
+        assert list_chat_sessions(root) == ["b"]
+
+    def test_skips_torn_line(self, tmp_path):
+        root = tmp_path / "h"
+        append_chat_history(root, "a", 0, [b'{"n":0}'])
+        with gzip.open(root / "a.jsonl.gz", "ab") as f:
+            f.write(b'{"i":1}\t{"n"')
+        assert load_chat_session(root, "a") == [b'{"n":0}']
+
+    def test_repairs_torn_member(self, tmp_path):
+        root = tmp_path / "h"
+        append_chat_history(root, "a", 0, [b'{"n":0}'])
+        with (root / "a.jsonl.gz").open("ab") as f:
+            f.write(gzip.compress(b'{"i":1}\t{"n":1}\n')[:-8])
+        assert load_chat_session(root, "a") == [b'{"n":0}', b'{"n":1}']
+        append_chat_history(root, "a", 2, [b'{"n":2}'])
+        assert load_chat_session(root, "a") == [b'{"n":0}', b'{"n":1}', b'{"n":2}']
+
+    def test_keeps_messages_as_raw_json(self, tmp_path):
+        root = tmp_path / "h"
+        append_chat_history(root, "a", 0, [b'{"s":"a\\tb"}'])
+        assert load_chat_session(root, "a") == [b'{"s":"a\\tb"}']
+
+    def test_compacts_dead_records(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tui, "HISTORY_COMPACT_MIN", 1)
+        root = tmp_path / "h"
+        for _ in range(10):
+            append_chat_history(root, "a", 0, [b'{"n":0}'])
+        messages = load_chat_session(root, "a")
+        with gzip.open(root / "a.jsonl.gz") as f:
+            assert len(f.readlines()) == 1
+        assert load_chat_session(root, "a") == messages
+
+    def test_imports_legacy_file(self, tmp_path, monkeypatch):
+        legacy = tmp_path / "old.json"
+        legacy.write_text('{"current": "a", "conversations": {"a": {"messages": [{"n": 0}]}}}')
+        monkeypatch.setattr(tui, "LEGACY_LOG_FILE", tmp_path / "old.jsonl")
+        monkeypatch.setattr(tui, "LEGACY_HISTORY_FILE", legacy)
+        root = tmp_path / "h"
+        assert list_chat_sessions(root) == ["a"]
+        assert load_chat_session(root, "a") == [b'{"n":0}']
+
+    def test_imports_shared_log(self, tmp_path, monkeypatch):
+        legacy = tmp_path / "old.jsonl"
+        legacy.write_text('{"c":"a","i":0}\t{"n":0}\n{"c":"b","i":0}\t{"n":1}\n{"c":"b","del":true}\n')
+        monkeypatch.setattr(tui, "LEGACY_LOG_FILE", legacy)
+        root = tmp_path / "h"
+        assert list_chat_sessions(root) == ["a"]
+        assert load_chat_session(root, "a") == [b'{"n":0}']
+
+
+class TestSessionPreview:
+    def test_first_user_prompt(self):
+        messages = [
+            {"kind": "request", "parts": [
+                {"part_kind": "system-prompt", "content": "sys"},
+                {"part_kind": "user-prompt", "content": "hello"},
+            ]},
+            {"kind": "request", "parts": [{"part_kind": "user-prompt", "content": "later"}]},
+        ]
+        assert get_session_preview(messages) == "hello"
+
+    def test_truncates_long_prompt(self):
+        messages = [{"kind": "request", "parts": [{"part_kind": "user-prompt", "content": "x" * 50}]}]
+        assert get_session_preview(messages) == "x" * 37 + "..."
+
+    def test_empty_session(self):
+        assert get_session_preview([]) == "(empty session)"
+
+
+class TestHistoryWindow:
+    @staticmethod
+    def _turns(n):
+        history = [ModelRequest(parts=[SystemPromptPart(content="sys"), UserPromptPart(content="0")])]
+        history.append(ModelResponse(parts=[TextPart(content="r0")]))
+        for i in range(1, n):
+            history.append(ModelRequest(parts=[UserPromptPart(content=str(i))]))
+            history.append(ModelResponse(parts=[ToolCallPart(tool_name="t", tool_call_id=str(i))]))
+            history.append(ModelRequest(parts=[ToolReturnPart(tool_name="t", content="", tool_call_id=str(i))]))
+            history.append(ModelResponse(parts=[TextPart(content=f"r{i}")]))
+        return history
+
+    def test_short_history_unchanged(self, monkeypatch):
+        monkeypatch.setattr(tui, "HISTORY_WINDOW_TURNS", 4)
+        history = self._turns(4)
+        assert window_history(history) is history
+
+    def test_drops_whole_turns_in_steps(self, monkeypatch):
+        monkeypatch.setattr(tui, "HISTORY_WINDOW_TURNS", 4)
+        monkeypatch.setattr(tui, "HISTORY_WINDOW_STEP", 2)
+        history = self._turns(5)
+        window = window_history(history)
+        assert [p.content for p in window[0].parts] == ["sys", "2"]
+        assert window[1:] == history[7:]
+        # The cut holds until another full step of turns has accumulated
+        assert window_history(self._turns(6))[0].parts[1].content == "2"
+        assert window_history(self._turns(7))[0].parts[1].content == "4"
+
+    def test_step_wider_than_window(self, monkeypatch):
+        monkeypatch.setattr(tui, "HISTORY_WINDOW_TURNS", 1)
+        monkeypatch.setattr(tui, "HISTORY_WINDOW_STEP", 5)
+        history = self._turns(3)
+        window = window_history(history)
+        assert [p.content for p in window[0].parts] == ["sys", "2"]
+        assert window[1:] == history[7:]
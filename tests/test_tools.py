@@ -61,6 +61,10 @@ class TestRunShell:
         run_shell(mock_ctx, "touch existing.txt")
         assert mock_ctx.deps.fs.files[f"{VIRTUAL_ROOT}/existing.txt"] == "content"
 
+    def test_touch_hash_in_filename(self, mock_ctx):
+        run_shell(mock_ctx, "touch my#file.txt")
+        assert f"{VIRTUAL_ROOT}/my#file.txt" in mock_ctx.deps.fs.files
+
     def test_touch_no_arg_error(self, mock_ctx):
         result = run_shell(mock_ctx, "touch")
         assert "Error" in result
@@ -140,6 +144,55 @@ class TestGrepCommand:
         assert "test.txt:2:bar456" in result
         assert "baz" not in result
 
+    def test_grep_anchors_apply_per_line(self, mock_ctx):
+        """Grep anchors match at line boundaries, not just file boundaries."""
+        mock_ctx.deps.fs.write("test.txt", "foo\nbar\nfoobar")
+        result = run_shell(mock_ctx, "grep ^bar")
+        assert "test.txt:2:bar" in result
+        assert "test.txt:3" not in result
+
+    def test_grep_string_anchors_apply_per_line(self, mock_ctx):
+        """\\A and \\Z anchor at each line, as when lines were searched one by one."""
+        mock_ctx.deps.fs.write("test.py", "import os\nx = 1\nimport re")
+        result = run_shell(mock_ctx, r"grep \Aimport test.py")
+        assert "test.py:1:import os" in result
+        assert "test.py:3:import re" in result
+        assert "test.py:1" in run_shell(mock_ctx, r"grep os\Z test.py")
+
+    def test_grep_lookbehind_stays_within_line(self, mock_ctx):
+        mock_ctx.deps.fs.write("test.txt", "a\nb")
+        assert run_shell(mock_ctx, r"grep (?<=\n)b test.txt") == "No matches found."
+
+    def test_grep_lookahead_stays_within_line(self, mock_ctx):
+        mock_ctx.deps.fs.write("test.txt", "foo\nbar foo \nbaz")
+        result = run_shell(mock_ctx, r"grep foo(?=\s) test.txt")
+        assert "test.txt:2:bar foo " in result
+        assert "test.txt:1" not in result
+        assert run_shell(mock_ctx, r"grep o(?=\n) test.txt") == "No matches found."
+        assert "test.txt:1:foo" in run_shell(mock_ctx, r"grep foo(?!\s) test.txt")
+
+    def test_grep_match_does_not_span_lines(self, mock_ctx):
+        """Grep matches within a single line only."""
+        mock_ctx.deps.fs.write("test.txt", "hello\nworld")
+        result = run_shell(mock_ctx, r"grep hello\s+world")
+        assert result == "No matches found."
+
+    def test_grep_hash_pattern(self, mock_ctx):
+        """Grep treats "#" as part of the pattern, not a comment."""
+        mock_ctx.deps.fs.write("test.c", "#include <x.h>\nint x;\nfoo#bar")
+        result = run_shell(mock_ctx, "grep ^# test.c")
+        assert "test.c:1:#include <x.h>" in result
+        assert "test.c:2" not in result
+        assert "test.c:3:foo#bar" in run_shell(mock_ctx, "grep foo#bar")
+        assert "test.c:1" in run_shell(mock_ctx, "grep '#include' test.c")
+
+    def test_grep_quoted_pattern_with_spaces(self, mock_ctx):
+        """Grep accepts quoted patterns containing spaces."""
+        mock_ctx.deps.fs.write("test.txt", "hello world\nhello")
+        result = run_shell(mock_ctx, 'grep "hello world"')
+        assert "test.txt:1:hello world" in result
+        assert "test.txt:2" not in result
+
     def test_grep_context_after(self, mock_ctx):
         """Grep -A shows lines after match."""
         mock_ctx.deps.fs.write("test.txt", "a\nmatch\nb\nc")
@@ -187,3 +240,14 @@ class TestGrepCommand:
         mock_ctx.deps.fs.write("test.txt", "content")
         result = run_shell(mock_ctx, "grep content")
         assert ".dir" not in result
+
+    def test_grep_scopes_to_directory(self, mock_ctx):
+        """Grep on a directory searches its subtree, not siblings sharing its prefix."""
+        mock_ctx.deps.fs.write("docs/a.txt", "match")
+        mock_ctx.deps.fs.write("docs/sub/b.txt", "match")
+        mock_ctx.deps.fs.write("docs2/c.txt", "match")
+        result = run_shell(mock_ctx, "grep match docs")
+        assert result.splitlines() == [
+            f"{VIRTUAL_ROOT}/docs/a.txt:1:match",
+            f"{VIRTUAL_ROOT}/docs/sub/b.txt:1:match",
+        ]
@@ -74,6 +74,45 @@ class TestListDir:
         assert "top.txt" in listing
         assert "nested.txt" not in listing
 
+    def test_ignores_sibling_with_shared_prefix(self, vfs):
+        vfs.files[f"{VIRTUAL_ROOT}/dir/a.txt"] = "a"
+        vfs.files[f"{VIRTUAL_ROOT}/dirty.txt"] = "b"
+        assert vfs.list_dir(f"{VIRTUAL_ROOT}/dir") == "a.txt"
+
+    def test_hides_dir_markers(self, vfs):
+        vfs.files[f"{VIRTUAL_ROOT}/docs/.dir"] = ""
+        assert vfs.list_dir(f"{VIRTUAL_ROOT}/docs") == "(empty directory)"
+
+    def test_reflects_deletions(self, vfs):
+        vfs.files[f"{VIRTUAL_ROOT}/a.txt"] = "a"
+        vfs.files.pop(f"{VIRTUAL_ROOT}/a.txt")
+        assert vfs.list_dir(VIRTUAL_ROOT) == "(empty directory)"
+
+
+class TestFileTable:
+    def test_assigned_dict_is_indexed(self, vfs):
+        vfs.files = {f"{VIRTUAL_ROOT}/a.txt": "a"}
+        assert vfs.list_dir(VIRTUAL_ROOT) == "a.txt"
+        assert vfs.sorted_paths() == [f"{VIRTUAL_ROOT}/a.txt"]
+
+    def test_assignment_changes_version(self, vfs):
+        version = vfs.files.version
+        vfs.files = {}
+        assert vfs.files.version != version
+
+    def test_all_mutators_bump_version_and_index(self, vfs):
+        files = vfs.files
+        for mutate in (
+            lambda: files.setdefault(f"{VIRTUAL_ROOT}/a.txt", "a"),
+            lambda: files.__ior__({f"{VIRTUAL_ROOT}/b.txt": "b"}),
+            lambda: files.popitem(),
+        ):
+            version = files.version
+            mutate()
+            assert files.version != version
+            assert vfs.sorted_paths() == sorted(files)
+        assert vfs.list_dir(VIRTUAL_ROOT) == "a.txt"
+
 
 class TestDiskSync:
     def test_load_from_disk(self, vfs, tmp_path):
@@ -88,6 +127,38 @@ class TestDiskSync:
         assert count == 1
         assert (tmp_path / "output.txt").read_text() == "saved"
 
+    def test_save_skips_unchanged_files(self, vfs, tmp_path, monkeypatch):
+        import virtual_agent
+
+        vfs.files["/virtual/a.txt"] = "a"
+        vfs.files["/virtual/b.txt"] = "b"
+        vfs.save_to_disk(tmp_path, "/virtual")
+        vfs.files["/virtual/b.txt"] = "changed"
+        written = []
+
+        def tracking_open(path, *args):
+            written.append(path)
+            return open(path, *args)
+
+        monkeypatch.setattr(virtual_agent, "open", tracking_open, raising=False)
+        assert vfs.save_to_disk(tmp_path, "/virtual") == 2
+        assert written == [str(tmp_path / "b.txt")]
+
+    def test_save_rewrites_files_changed_on_disk(self, vfs, tmp_path):
+        (tmp_path / "file.txt").write_text("loaded")
+        vfs.load_from_disk(tmp_path, "/virtual")
+        (tmp_path / "file.txt").unlink()
+        vfs.save_to_disk(tmp_path, "/virtual")
+        assert (tmp_path / "file.txt").read_text() == "loaded"
+
+    def test_load_skips_excluded_entries(self, vfs, tmp_path):
+        (tmp_path / ".state").mkdir()
+        (tmp_path / ".state" / "log.jsonl").write_text("{}")
+        (tmp_path / "keep.txt").write_text("kept")
+        count = vfs.load_from_disk(tmp_path, "/virtual", exclude={".state"})
+        assert count == 1
+        assert list(vfs.files) == ["/virtual/keep.txt"]
+
     def test_load_nonexistent_path(self, vfs, tmp_path):
         count = vfs.load_from_disk(tmp_path / "nonexistent")
         assert count == 0
@@ -1,8 +1,9 @@
 """Lightweight theme loader for the TUI."""
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-
-import yaml
+from string import Template
 
 THEMES_DIR = Path(__file__).parent / "themes"
 USER_THEMES_DIR = Path.home() / ".config" / "pyagents" / "themes"
@@ -15,15 +16,22 @@ REQUIRED_COLORS = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class Theme:
     name: str
     description: str
     colors: dict[str, str]
+    css: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Rendered once here; load_theme caches the Theme, so this runs per file change
+        self.css = CSS_TEMPLATE.substitute(self.colors, name=self.name)
 
 
 def load_theme(name: str) -> Theme:
     """Load theme by name from built-in or user directory."""
+    if Path(name).name != name:
+        raise FileNotFoundError(f"Theme not found: {name}")
     user_path = USER_THEMES_DIR / f"{name}.yaml"
     builtin_path = THEMES_DIR / f"{name}.yaml"
 
@@ -31,7 +39,17 @@ def load_theme(name: str) -> Theme:
     if not path.exists():
         raise FileNotFoundError(f"Theme not found: {name}")
 
-    data = yaml.safe_load(path.read_text())
+    return _parse_theme(name, path, path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _parse_theme(name: str, path: Path, mtime_ns: int) -> Theme:
+    """Parse and validate a theme file; keyed on mtime so edits are picked up."""
+    import yaml  # Deferred: only needed on a cache miss
+
+    # libyaml's C parser when available, pure-Python otherwise
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    data = yaml.load(path.read_bytes(), Loader=loader)
 
     missing = REQUIRED_COLORS - set(data.get("colors", {}).keys())
     if missing:
@@ -46,160 +64,183 @@ def load_theme(name: str) -> Theme:
 
 def list_themes() -> list[str]:
     """List available theme names."""
-    themes = set()
-    for dir in [THEMES_DIR, USER_THEMES_DIR]:
-        if dir.exists():
-            themes.update(p.stem for p in dir.glob("*.yaml"))
-    return sorted(themes)
+    # Adding, removing or renaming a theme file bumps its directory's mtime
+    return list(_scan_themes(_dir_mtime(THEMES_DIR), _dir_mtime(USER_THEMES_DIR)))
+
+
+def _dir_mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=4)
+def _scan_themes(builtin_mtime: int | None, user_mtime: int | None) -> tuple[str, ...]:
+    """Scan both theme directories; keyed on their mtimes so new files are picked up."""
+    names = []
+    for dir in (THEMES_DIR, USER_THEMES_DIR):
+        try:
+            with os.scandir(dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".yaml") and entry.is_file():
+                        names.append(entry.name[:-5])
+        except FileNotFoundError:
+            pass
+    names.sort()
+    # User themes may shadow built-ins; drop the adjacent duplicates
+    return tuple(n for i, n in enumerate(names) if i == 0 or n != names[i - 1])
 
 
 def generate_css(theme: Theme) -> str:
     """Generate Textual CSS from theme colors."""
-    c = theme.colors
-    return f'''/* Auto-generated from theme: {theme.name} */
+    return theme.css
+
 
-Screen {{
-    background: {c["bg_primary"]};
-}}
+CSS_TEMPLATE = Template('''/* Auto-generated from theme: $name */
+
+Screen {
+    background: $bg_primary;
+}
 
-#header {{
+#header {
     dock: top;
     height: 1;
-    background: {c["bg_surface"]};
+    background: $bg_surface;
     padding: 0 1;
-}}
+}
 
-#header-title {{
-    color: {c["accent"]};
+#header-title {
+    color: $accent;
     text-style: bold;
     width: auto;
-}}
+}
 
-#header-status {{
-    color: {c["accent"]};
+#header-status {
+    color: $accent;
     text-align: right;
     width: 1fr;
-}}
+}
 
-#messages {{
+#messages {
     padding: 1;
     scrollbar-size: 1 1;
-    scrollbar-background: {c["bg_surface"]};
-    scrollbar-color: {c["chrome"]};
-}}
+    scrollbar-background: $bg_surface;
+    scrollbar-color: $chrome;
+}
 
-.user-message {{
+.user-message {
     height: auto;
     margin: 0 0 1 0;
-}}
+}
 
-.agent-message {{
-    color: {c["text_secondary"]};
+.agent-message {
+    color: $text_secondary;
     margin: 0 0 2 0;
     padding: 0;
-}}
+}
 
-.tool-call {{
-    color: {c["tool_call"]};
+.tool-call {
+    color: $tool_call;
     margin: 0;
-}}
+}
 
-.tool-result {{
-    color: {c["tool_result"]};
+.tool-result {
+    color: $tool_result;
     margin: 0;
-}}
+}
 
-.error-message {{
-    color: {c["error"]};
-}}
+.error-message {
+    color: $error;
+}
 
-.system-message {{
-    color: {c["success"]};
+.system-message {
+    color: $success;
     text-style: italic;
     margin: 0 0 1 0;
-}}
+}
 
-Input#prompt-single {{
+Input#prompt-single {
     dock: bottom;
     height: 3;
     margin: 0 1 1 1;
-    background: {c["bg_surface"]};
-    border: tall {c["chrome"]};
+    background: $bg_surface;
+    border: tall $chrome;
     padding: 0 1;
-}}
+}
 
-Input#prompt-single:focus {{
-    border: tall {c["accent"]};
-}}
+Input#prompt-single:focus {
+    border: tall $accent;
+}
 
-TextArea#prompt-multi {{
+TextArea#prompt-multi {
     dock: bottom;
     height: auto;
     min-height: 3;
     max-height: 8;
     margin: 0 1 1 1;
-    background: {c["bg_surface"]};
-    border: tall {c["chrome"]};
+    background: $bg_surface;
+    border: tall $chrome;
     padding: 0 1;
-}}
+}
 
-TextArea#prompt-multi:focus {{
-    border: tall {c["accent"]};
-}}
+TextArea#prompt-multi:focus {
+    border: tall $accent;
+}
 
-TextArea#prompt-multi .text-area--cursor {{
-    background: {c["accent"]};
-}}
+TextArea#prompt-multi .text-area--cursor {
+    background: $accent;
+}
 
-TextArea#prompt-multi .text-area--placeholder {{
-    color: {c["text_muted"]};
-}}
+TextArea#prompt-multi .text-area--placeholder {
+    color: $text_muted;
+}
 
-.hidden {{
+.hidden {
     display: none;
-}}
+}
 
-SelectorScreen {{
+SelectorScreen {
     align: center middle;
     background: rgba(10, 10, 11, 0.85);
-}}
+}
 
-#selector-title {{
-    color: {c["accent"]};
+#selector-title {
+    color: $accent;
     text-style: bold;
     padding: 0 0 1 0;
     text-align: center;
-}}
+}
 
-#selector-list {{
+#selector-list {
     width: auto;
     min-width: 40;
     max-height: 12;
-    background: {c["bg_surface"]};
-    border: round {c["chrome"]};
+    background: $bg_surface;
+    border: round $chrome;
     padding: 0 1;
-}}
+}
 
-#selector-list:focus {{
-    border: round {c["accent"]};
-}}
+#selector-list:focus {
+    border: round $accent;
+}
 
-#selector-list > .option-list--option-highlighted {{
-    background: {c["bg_primary"]};
-    color: {c["accent"]};
-}}
+#selector-list > .option-list--option-highlighted {
+    background: $bg_primary;
+    color: $accent;
+}
 
-.copy-target {{
-    border: round {c["accent"]};
-}}
+.copy-target {
+    border: round $accent;
+}
 
-.rewind-target {{
+.rewind-target {
     opacity: 0.6;
-}}
+}
 
-.rewind-selected {{
+.rewind-selected {
     opacity: 1.0;
-    border: tall {c["accent"]};
-    background: {c["bg_surface"]};
-}}
-'''
+    border: tall $accent;
+    background: $bg_surface;
+}
+''')
@@ -1,13 +1,25 @@
+import asyncio
+import gzip
 import json
 import os
 import subprocess
 import sys
 import tempfile
 import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable
 
-from pydantic_ai import CallToolsNode, ModelMessagesTypeAdapter, ModelRequestNode, UsageLimits
-from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, ToolCallPart, ToolReturnPart, UserPromptPart
+from pydantic import ConfigDict, TypeAdapter
+
+from pydantic_ai import Agent, CallToolsNode, ModelMessagesTypeAdapter, ModelRequestNode, UsageLimits
+from pydantic_ai.messages import (
+    ModelMessage, ModelRequest, ModelResponse, PartDeltaEvent, PartStartEvent, TextPart, TextPartDelta,
+    SystemPromptPart, ToolCallPart, ToolReturnPart, UserPromptPart,
+)
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import Horizontal, VerticalScroll
@@ -21,26 +33,55 @@ import settings
 from theme import load_theme, list_themes, generate_css, DEFAULT_THEME
 from virtual_agent import VirtualFileSystem, AgentDeps, create_agent, MODELS, ThinkingEffort, VIRTUAL_ROOT
 
-WORKSPACE_PATH = Path("./workspace")
-HISTORY_FILE = WORKSPACE_PATH / ".chat_history.json"
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json otherwise
+    orjson = None
 
+# Per-message twin of ModelMessagesTypeAdapter, so each message is stored as its own JSON blob
+_MESSAGE_ADAPTER = TypeAdapter(
+    ModelMessage, config=ConfigDict(ser_json_bytes="base64", val_json_bytes="base64")
+)
 
-def _copy_to_clipboard(text: str) -> bool:
-    """Copy text to system clipboard. Returns success status."""
-    if sys.platform == "darwin":
-        cmd = ["pbcopy"]
-    elif sys.platform == "linux":
-        cmd = ["xclip", "-selection", "clipboard"]
-    elif sys.platform == "win32":
-        cmd = ["clip"]
-    else:
+WORKSPACE_PATH = Path("./workspace")
+HISTORY_DIR = WORKSPACE_PATH / ".chat_history"  # One log per conversation
+HISTORY_LOG_SUFFIX = ".jsonl.gz"
+HISTORY_GZIP_LEVEL = 6  # zlib's default; 9 costs far more CPU for a few percent
+# Earlier single-file formats; imported once into HISTORY_DIR, then ignored
+LEGACY_LOG_FILE = WORKSPACE_PATH / ".chat_history.jsonl"
+LEGACY_HISTORY_FILE = WORKSPACE_PATH / ".chat_history.json"
+HISTORY_COMPACT_RATIO = 4  # Rewrite a log when records > ratio * live messages
+HISTORY_COMPACT_MIN = 64
+HISTORY_RENDER_BATCH = 100  # Messages mounted per batch; older batches load on scroll-up
+HISTORY_WINDOW_TURNS = 20  # Most recent turns sent to the model
+HISTORY_WINDOW_STEP = 10  # Turns dropped at a time, so the sent prefix stays stable in between
+COPY_CLASSES = frozenset({"tool-result", "agent-message"})
+MODEL_OPTIONS = [(key, f"{key} ({model_id})") for key, model_id in MODELS.items()]
+THINKING_OPTIONS = [("high", "high"), ("medium", "medium"), ("low", "low"), ("off", "off")]
+SPINNER_FRAMES = ("⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏")
+
+
+CLIPBOARD_COMMANDS = {
+    "darwin": ["pbcopy"],
+    "linux": ["xclip", "-selection", "clipboard"],
+    "win32": ["clip"],
+}
+_CLIPBOARD_CMD = CLIPBOARD_COMMANDS.get(sys.platform)
+
+
+async def _copy_to_clipboard(text: str) -> bool:
+    """Copy text to system clipboard without blocking the UI. Returns success status."""
+    global _CLIPBOARD_CMD
+    if _CLIPBOARD_CMD is None:
         return False
 
     try:
-        subprocess.run(cmd, input=text.encode(), check=True)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
+        proc = await asyncio.create_subprocess_exec(*_CLIPBOARD_CMD, stdin=asyncio.subprocess.PIPE)
+        await proc.communicate(text.encode())
+    except FileNotFoundError:
+        _CLIPBOARD_CMD = None  # Not installed; don't spawn it again
         return False
+    return proc.returncode == 0
 
 
 def _open_external_editor(initial: str = "") -> str:
@@ -57,43 +98,202 @@ def _open_external_editor(initial: str = "") -> str:
         os.unlink(path)
 
 
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _json_loads(data: bytes | str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=8)
+def _cached_agent(model_key: str, thinking_effort: ThinkingEffort) -> Agent[AgentDeps]:
+    """One agent per (model, effort); agents hold no per-run state, so toggling back reuses them."""
+    return create_agent(model_key, thinking_effort)
+
+
+class _MemoizedMarkdownParser:
+    """One shared gfm-like parser whose token streams are memoized by source text.
+
+    Textual builds a MarkdownIt per widget and parses on every update, so re-rendering a
+    resumed session would reparse every agent reply. Widgets only read the tokens.
+    """
+
+    def __init__(self) -> None:
+        from markdown_it import MarkdownIt  # Textual's own dependency
+
+        self.parse = lru_cache(maxsize=256)(MarkdownIt("gfm-like").parse)
+
+
+@lru_cache(maxsize=1)
+def _markdown_parser() -> _MemoizedMarkdownParser:
+    return _MemoizedMarkdownParser()
+
+
+@lru_cache(maxsize=1)
+def _streaming_markdown_parser():
+    """Shared parser for the reply being streamed; its partial sources would flush the memo."""
+    from markdown_it import MarkdownIt
+
+    return MarkdownIt("gfm-like")
+
+
 def format_tool_args(args) -> str:
     """Extract clean command from tool args."""
     # Handle dict
     if isinstance(args, dict) and "command" in args:
         return args["command"]
-    # Handle JSON string
+    # Handle JSON string (only an object can carry "command")
     if isinstance(args, str):
+        if not args.lstrip().startswith("{"):
+            return args
         try:
-            parsed = json.loads(args)
+            parsed = _json_loads(args)
             if isinstance(parsed, dict) and "command" in parsed:
                 return parsed["command"]
-        except json.JSONDecodeError:
+        except ValueError:  # json and orjson decode errors both subclass it
             pass
     return str(args)
 
 
-def load_chat_history(path: Path) -> tuple[str, dict]:
-    """Load history file, return (current_id, conversations dict)."""
-    if path.exists():
-        data = json.loads(path.read_text())
-        return data.get("current"), data.get("conversations", {})
-    return None, {}
+def list_chat_sessions(root: Path) -> list[str]:
+    """Return saved conversation ids, least recently updated first.
+
+    Each conversation is an append-only log, `root/<id>.jsonl.gz`, with one gzip member
+    per append. Each line is an {"i": index} header, then a tab and the message JSON if
+    present: truncate the conversation to `index`, then append the message. Older
+    single-file histories are split into this layout the first time it is missing.
+    """
+    if not root.exists():
+        _import_legacy_history(root)
+    try:
+        with os.scandir(root) as entries:
+            logs = [
+                (e.stat().st_mtime_ns, e.name[:-len(HISTORY_LOG_SUFFIX)])
+                for e in entries
+                if e.name.endswith(HISTORY_LOG_SUFFIX)
+            ]
+    except FileNotFoundError:
+        return []
+    return [conv_id for _, conv_id in sorted(logs)]
+
+
+def load_chat_session(root: Path, conv_id: str) -> list[bytes]:
+    """Replay one conversation's log into raw message JSON (empty if it has none).
+
+    The log is compacted here once dead records outnumber live ones several times, or
+    rewritten if it ends in a torn gzip member that later appends would be stuck behind.
+    """
+    path = _log_path(root, conv_id)
+    try:
+        lines, intact = _read_log(path)
+    except FileNotFoundError:
+        return []
+    conversations, records = _replay_log(lines)
+    messages = conversations.get(None, [])
+    if not intact or records > HISTORY_COMPACT_RATIO * max(len(messages), HISTORY_COMPACT_MIN):
+        _write_chat_log(path, messages)
+    return messages
+
+
+def append_chat_history(root: Path, conv_id: str, start: int, messages: list[bytes]) -> None:
+    """Append serialized messages[k] as index start + k of a conversation (truncating there first)."""
+    root.mkdir(parents=True, exist_ok=True)
+    if messages:
+        lines = [_history_line(start + k, m) for k, m in enumerate(messages)]
+    else:
+        lines = [_json_dumps({"i": start}) + b"\n"]
+    with gzip.open(_log_path(root, conv_id), "ab", compresslevel=HISTORY_GZIP_LEVEL) as f:
+        f.write(b"".join(lines))
+
+
+def delete_chat_history(root: Path, conv_id: str) -> None:
+    """Remove a conversation's log."""
+    _log_path(root, conv_id).unlink(missing_ok=True)
+
+
+def _log_path(root: Path, conv_id: str) -> Path:
+    return root / f"{conv_id}{HISTORY_LOG_SUFFIX}"
+
 
+def _read_log(path: Path) -> tuple[list[bytes], bool]:
+    """Return a log's lines and whether it decompressed cleanly to the end."""
+    lines = []
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                lines.append(line)
+        except (EOFError, OSError, zlib.error):  # Torn final write
+            return lines, False
+    return lines, True
+
+
+def _history_line(index: int, message: bytes) -> bytes:
+    # Compact JSON never contains a raw tab, so it safely separates header and message
+    return _json_dumps({"i": index}) + b"\t" + message + b"\n"
+
+
+def _replay_log(lines: Iterable[bytes]) -> tuple[dict, int]:
+    """Replay log lines into ({conversation id: messages}, record count).
+
+    Headers without a "c" id (per-conversation logs) collect under None.
+    """
+    conversations, records = {}, 0
+    for line in lines:
+        if not line.endswith(b"\n"):
+            continue  # Torn final write
+        head, _, message = line[:-1].partition(b"\t")
+        try:
+            rec = _json_loads(head)
+        except ValueError:
+            continue
+        records += 1
+        conv_id = rec.get("c")
+        if rec.get("del"):
+            conversations.pop(conv_id, None)
+            continue
+        messages = conversations.setdefault(conv_id, [])
+        del messages[rec["i"]:]
+        if "m" in rec:  # Older logs embedded the message in the header
+            message = _json_dumps(rec["m"])
+        if message:
+            messages.append(message)
+    return conversations, records
+
+
+def _import_legacy_history(root: Path) -> None:
+    """Split a single-file history (shared log or JSON document) into per-conversation logs."""
+    if LEGACY_LOG_FILE.exists():
+        with LEGACY_LOG_FILE.open("rb") as f:
+            conversations = _replay_log(f)[0]
+    elif LEGACY_HISTORY_FILE.exists():
+        data = _json_loads(LEGACY_HISTORY_FILE.read_bytes())
+        conversations = {
+            conv_id: [_json_dumps(m) for m in conv["messages"]]
+            for conv_id, conv in data.get("conversations", {}).items()
+        }
+    else:
+        return
+    root.mkdir(parents=True, exist_ok=True)
+    for conv_id, messages in conversations.items():
+        _write_chat_log(_log_path(root, conv_id), messages)
 
-def save_chat_history(path: Path, current_id: str, conversations: dict) -> None:
-    """Save history to file."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps({"current": current_id, "conversations": conversations}))
+
+def _write_chat_log(path: Path, messages: list[bytes]) -> None:
+    """Rewrite a conversation's log with only live messages (atomic replace)."""
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wb", compresslevel=HISTORY_GZIP_LEVEL) as f:
+        f.writelines(_history_line(i, m) for i, m in enumerate(messages))
+    os.replace(tmp, path)
 
 
 def format_tool_result(content: str) -> Static:
     """Format tool result as single multi-line widget."""
-    lines = str(content).split("\n")
-    formatted = "\n".join(
-        f"{'│ └─ ' if i == 0 else '│    '}{line}"
-        for i, line in enumerate(lines)
-    )
+    formatted = "│ └─ " + str(content).replace("\n", "\n│    ")
     widget = Static(formatted, classes="tool-result", markup=False)
     widget.copyable_content = content
     return widget
@@ -104,7 +304,12 @@ def format_tool_call(part: ToolCallPart) -> Static:
     return Static(f"│ ⚡ {part.tool_name}: {format_tool_args(part.args)}", classes="tool-call", markup=False)
 
 
-def get_session_preview(messages: list) -> str:
+def _read_session_preview(root: Path, conv_id: str) -> str:
+    # Parses stored messages only until the first prompt is found
+    return get_session_preview(_json_loads(m) for m in load_chat_session(root, conv_id))
+
+
+def get_session_preview(messages: Iterable[dict]) -> str:
     """Extract first user prompt as session preview."""
     for msg in messages:
         if msg.get("kind") == "request":
@@ -117,6 +322,23 @@ def get_session_preview(messages: list) -> str:
     return "(empty session)"
 
 
+def window_history(history: list[ModelMessage]) -> list[ModelMessage]:
+    """Trim history to the recent turns sent to the model, keeping the system prompt."""
+    # Cut only where a user prompt starts a turn, so tool calls stay paired with their returns
+    starts = [
+        i for i, msg in enumerate(history)
+        if isinstance(msg, ModelRequest) and any(isinstance(p, UserPromptPart) for p in msg.parts)
+    ]
+    excess = len(starts) - HISTORY_WINDOW_TURNS
+    if excess <= 0:
+        return history
+    dropped = -(-excess // HISTORY_WINDOW_STEP) * HISTORY_WINDOW_STEP
+    cut = starts[min(dropped, len(starts) - 1)]  # A step wider than the window still keeps the last turn
+    system = [p for p in history[0].parts if isinstance(p, SystemPromptPart)]
+    first = history[cut]
+    return [replace(first, parts=[*system, *first.parts]), *history[cut + 1:]]
+
+
 class SelectorScreen(ModalScreen[str | None]):
     """Modal selector for models/thinking levels. Returns selected key or None on ESC."""
 
@@ -163,10 +385,19 @@ class SessionSelectorScreen(ModalScreen[tuple[str, str] | None]):
         yield Static("[b]Sessions[/b]", id="selector-title")
         option_list = OptionList(id="selector-list")
         for session_id, preview in self.sessions:
-            marker = "→ " if session_id == self.current_id else "  "
-            option_list.add_option(Option(f"{marker}{preview}", id=session_id))
+            option_list.add_option(Option(self._label(session_id, preview), id=session_id))
         yield option_list
 
+    def _label(self, session_id: str, preview: str) -> str:
+        marker = "→ " if session_id == self.current_id else "  "
+        return f"{marker}{preview}"
+
+    def set_preview(self, session_id: str, preview: str) -> None:
+        """Fill in a preview that finished loading after the screen was created."""
+        self.sessions = [(sid, preview if sid == session_id else p) for sid, p in self.sessions]
+        for option_list in self.query("#selector-list").results(OptionList):
+            option_list.replace_option_prompt(session_id, self._label(session_id, preview))
+
     def on_mount(self) -> None:
         self.query_one("#selector-list", OptionList).focus()
 
@@ -206,11 +437,12 @@ class VirtualAgentApp(App):
         self._thinking_timer = None
         self._thinking_frame = 0
 
-        count = self.fs.load_from_disk(self.workspace_path)
+        # The history logs are the app's own; loading them would let a save write back stale copies
+        count = self.fs.load_from_disk(self.workspace_path, exclude={HISTORY_DIR.name})
         if count == 0:
             self.fs.files[f"{VIRTUAL_ROOT}/readme.txt"] = "Welcome to Virtual OS."
 
-        self._snapshot = dict(self.fs.files)
+        self._saved_version = self.fs.files.version
         self.deps = AgentDeps(fs=self.fs, user_name="user", workspace_path=self.workspace_path)
 
         # Load persisted settings
@@ -218,14 +450,20 @@ class VirtualAgentApp(App):
         self.thinking_effort: ThinkingEffort = settings.get("thinking", "high")
         self.theme_name = settings.get("theme", DEFAULT_THEME)
 
-        self.agent = create_agent(self.current_model, self.thinking_effort)
+        self._agent: Agent[AgentDeps] | None = None  # Built on first use, see `agent`
         self._theme = load_theme(self.theme_name)
+        self._render_theme_markup()
 
-        # Load saved sessions, always start fresh
-        _, conversations = load_chat_history(HISTORY_FILE)
-        self.conversations = conversations
-        self.conversation_id = str(uuid.uuid4())
+        # List saved sessions (messages are read on demand), always start fresh
+        self.sessions = list_chat_sessions(HISTORY_DIR)
+        self.conversation_id = uuid.uuid4().hex
         self.history = []
+        self._persisted_len = 0  # Leading messages of self.history already in the log
+        self._rendered_from = 0  # First history index with mounted widgets
+        self._stored_len = 0  # Messages the current conversation's log replays to
+        self._preview_cache: dict[str, str] = {}  # Session id -> selector preview
+        # One worker keeps log I/O in order while moving it off the UI thread
+        self._history_io = ThreadPoolExecutor(max_workers=1)
 
         # Copy mode state
         self.copy_mode = False
@@ -246,13 +484,16 @@ class VirtualAgentApp(App):
 
     def switch_theme(self, name: str) -> str:
         """Switch to a different theme. Returns status message."""
-        available = list_themes()
-        if name not in available:
-            return f"Unknown theme: {name}. Available: {', '.join(available)}"
-
-        self._theme = load_theme(name)
+        try:
+            theme = load_theme(name)
+        except FileNotFoundError:
+            return f"Unknown theme: {name}. Available: {', '.join(list_themes())}"
+        if theme.css == self._theme.css:
+            return f"Theme: {name}"  # Nothing visible changes; skip the stylesheet reparse
+        self._theme = theme
         self.theme_name = name
         settings.set("theme", name)
+        self._render_theme_markup()
 
         # Replace CSS source and reapply to all widgets
         self.stylesheet.add_source(generate_css(self._theme), read_from="theme")
@@ -261,10 +502,15 @@ class VirtualAgentApp(App):
         self.refresh(layout=True)
         return f"Theme: {name}"
 
+    def _render_theme_markup(self) -> None:
+        """Build the accent-colored markup used on every prompt and spinner tick."""
+        accent = self._theme.colors["accent"]
+        self._user_prefix = f"[{accent}]┃[/] "
+        self._spinner_frames = [f"[{accent}]{dot}[/] thinking..." for dot in SPINNER_FRAMES]
+
     def show_theme_selector(self) -> None:
         """Show theme selector modal."""
-        themes = list_themes()
-        options = [(t, t) for t in themes]
+        options = [(t, t) for t in list_themes()]
         self.push_screen(
             SelectorScreen("Select Theme", options, self.theme_name),
             callback=self._on_theme_selected
@@ -276,13 +522,20 @@ class VirtualAgentApp(App):
             msg = self.switch_theme(selected)
             self._show_system_message(msg)
 
+    @property
+    def agent(self) -> Agent[AgentDeps]:
+        """Agent for the current model and thinking effort, created on first prompt."""
+        if self._agent is None:
+            self._agent = _cached_agent(self.current_model, self.thinking_effort)
+        return self._agent
+
     def switch_model(self, model_key: str) -> str:
         """Switch to a different model. Returns status message."""
         if model_key not in MODELS:
             return f"Unknown model: {model_key}. Available: {', '.join(MODELS.keys())}"
 
         self.current_model = model_key
-        self.agent = create_agent(model_key, self.thinking_effort)
+        self._agent = None
         settings.set("model", model_key)
         self._update_header_title()
         return f"Switched to {model_key}"
@@ -294,15 +547,14 @@ class VirtualAgentApp(App):
             return f"Invalid level. Use: low, medium, high, or off"
 
         self.thinking_effort = level
-        self.agent = create_agent(self.current_model, self.thinking_effort)
+        self._agent = None
         settings.set("thinking", level)
         return f"Thinking effort: {level or 'off'}"
 
     def show_model_selector(self) -> None:
         """Show model selector modal."""
-        options = [(key, f"{key} ({model_id})") for key, model_id in MODELS.items()]
         self.push_screen(
-            SelectorScreen("Select Model", options, self.current_model),
+            SelectorScreen("Select Model", MODEL_OPTIONS, self.current_model),
             callback=self._on_model_selected
         )
 
@@ -314,10 +566,9 @@ class VirtualAgentApp(App):
 
     def show_thinking_selector(self) -> None:
         """Show thinking level selector modal."""
-        options = [("high", "high"), ("medium", "medium"), ("low", "low"), ("off", "off")]
         current = self.thinking_effort or "off"
         self.push_screen(
-            SelectorScreen("Thinking Effort", options, current),
+            SelectorScreen("Thinking Effort", THINKING_OPTIONS, current),
             callback=self._on_thinking_selected
         )
 
@@ -331,18 +582,24 @@ class VirtualAgentApp(App):
 
     def show_sessions_selector(self) -> None:
         """Show session history modal."""
-        if not self.conversations:
+        if not self.sessions:
             self._show_system_message("No saved sessions")
             return
 
-        sessions = [
-            (sid, get_session_preview(data["messages"]))
-            for sid, data in self.conversations.items()
-        ]
-        self.push_screen(
-            SessionSelectorScreen(sessions, self.conversation_id),
-            callback=self._on_session_action
-        )
+        sessions = [(sid, self._preview_cache.get(sid, "…")) for sid in self.sessions]
+        screen = SessionSelectorScreen(sessions, self.conversation_id)
+        self.push_screen(screen, callback=self._on_session_action)
+        # Uncached previews each replay a whole log, so they fill in as they load
+        missing = [sid for sid in self.sessions if sid not in self._preview_cache]
+        if missing:
+            self.run_worker(self._load_session_previews(screen, missing))
+
+    async def _load_session_previews(self, screen: "SessionSelectorScreen", session_ids: list[str]) -> None:
+        for sid in session_ids:
+            # Queued behind pending writes, so every log is read complete
+            future = self._history_io.submit(_read_session_preview, HISTORY_DIR, sid)
+            preview = self._preview_cache[sid] = await asyncio.wrap_future(future)
+            screen.set_preview(sid, preview)
 
     def _on_session_action(self, result: tuple[str, str] | None) -> None:
         """Handle session selector result."""
@@ -362,12 +619,12 @@ class VirtualAgentApp(App):
 
         self._persist_conversation()
 
+        stored = await asyncio.wrap_future(self._history_io.submit(load_chat_session, HISTORY_DIR, session_id))
         self.conversation_id = session_id
-        self.history = ModelMessagesTypeAdapter.validate_python(
-            self.conversations[session_id]["messages"]
-        )
+        self.history = ModelMessagesTypeAdapter.validate_json(b"[" + b",".join(stored) + b"]")
+        self._persisted_len = self._stored_len = len(self.history)
 
-        messages = self.query_one("#messages", VerticalScroll)
+        messages = self._messages_view
         await messages.remove_children()
         await self._render_history()
         self._show_system_message("Resumed session")
@@ -378,16 +635,17 @@ class VirtualAgentApp(App):
             self._show_system_message("Cannot delete current session")
             return
 
-        del self.conversations[session_id]
-        save_chat_history(HISTORY_FILE, None, self.conversations)
+        self.sessions.remove(session_id)
+        self._preview_cache.pop(session_id, None)
+        self._history_io.submit(delete_chat_history, HISTORY_DIR, session_id)
         self._show_system_message("Session deleted")
 
-        if self.conversations:
+        if self.sessions:
             self.show_sessions_selector()
 
     def _show_system_message(self, msg: str) -> None:
         """Show a system message in the chat."""
-        messages = self.query_one("#messages", VerticalScroll)
+        messages = self._messages_view
         messages.mount(Static(f"[{msg}]", classes="system-message"))
         messages.scroll_end()
 
@@ -400,65 +658,126 @@ class VirtualAgentApp(App):
         yield TextArea(id="prompt-multi", soft_wrap=True, classes="hidden")
 
     async def on_mount(self) -> None:
+        # Widgets looked up on every message/status update; resolve them once
+        self._messages_view = self.query_one("#messages", VerticalScroll)
+        self._header_status = self.query_one("#header-status", Static)
+        self._header_title = self.query_one("#header-title", Static)
+        self._prompt_single = self.query_one("#prompt-single", Input)
+        self._prompt_multi = self.query_one("#prompt-multi", TextArea)
+        self.watch(self._messages_view, "scroll_y", self._on_history_scroll, init=False)
+
         # Apply theme CSS (css property isn't auto-loaded)
         self.stylesheet.add_source(generate_css(self._theme), read_from="theme")
         self.stylesheet.reparse()
         self.stylesheet.update(self)
 
         self._update_header_title()
-        self.query_one("#prompt-multi", TextArea).placeholder = "Ctrl+J to send..."
-        self.query_one("#prompt-single", Input).focus()
+        self._prompt_multi.placeholder = "Ctrl+J to send..."
+        self._prompt_single.focus()
         if self.history:
             await self._render_history()
 
     def on_unmount(self) -> None:
         self._persist_conversation()
+        self._history_io.shutdown(wait=True)  # Flush pending writes before exit
 
     def _persist_conversation(self) -> None:
-        """Save current conversation to history dict and disk."""
+        """Append messages added since the last save to the conversation's log."""
         if not self.history:
             return
-        self.conversations[self.conversation_id] = {
-            "messages": ModelMessagesTypeAdapter.dump_python(self.history, mode="json")
-        }
-        save_chat_history(HISTORY_FILE, self.conversation_id, self.conversations)
+        start = self._persisted_len
+        if start == len(self.history) == self._stored_len:
+            return  # Unchanged since the last write, e.g. a session reopened and left untouched
+        # Only messages past the persisted mark are serialized; older ones are never redone
+        new = [_MESSAGE_ADAPTER.dump_json(m) for m in self.history[start:]]
+        if start == 0:
+            # The whole conversation is at hand; refresh its preview without rereading the log
+            preview = get_session_preview(_json_loads(m) for m in new)
+            self._preview_cache[self.conversation_id] = preview
+        if self.conversation_id not in self.sessions:
+            self.sessions.append(self.conversation_id)
+        self._history_io.submit(append_chat_history, HISTORY_DIR, self.conversation_id, start, new)
+        self._persisted_len = self._stored_len = len(self.history)
 
     async def _render_history(self) -> None:
-        """Re-render conversation history into the UI."""
-        container = self.query_one("#messages", VerticalScroll)
-        for idx, msg in enumerate(self.history):
+        """Render the latest turns of history into the UI; older ones mount on scroll-up."""
+        container = self._messages_view
+        stop = len(self.history)
+        self._rendered_from = self._turn_start(max(0, stop - HISTORY_RENDER_BATCH))
+        widgets = self._history_widgets(self._rendered_from, stop)
+        # One mount for the whole batch instead of one await per part
+        if widgets:
+            await container.mount_all(widgets)
+        container.scroll_end()
+
+    def _on_history_scroll(self, scroll_y: float) -> None:
+        # max_scroll_y is 0 while the view is being cleared, so only a real scroll to the top counts
+        container = self._messages_view
+        if scroll_y == 0 and self._rendered_from > 0 and container.max_scroll_y > 0:
+            self.call_later(self._render_earlier_history)
+
+    async def _render_earlier_history(self) -> None:
+        """Mount the batch of turns before the oldest rendered one, keeping the view in place."""
+        stop = self._rendered_from
+        if stop == 0:
+            return  # Another scroll event already got here
+        self._rendered_from = self._turn_start(max(0, stop - HISTORY_RENDER_BATCH))
+        container = self._messages_view
+        old_height = container.virtual_size.height
+        await container.mount_all(self._history_widgets(self._rendered_from, stop), before=0)
+        self.call_after_refresh(
+            lambda: container.scroll_to(y=container.virtual_size.height - old_height, animate=False)
+        )
+
+    def _turn_start(self, index: int) -> int:
+        """Walk back from `index` to the user prompt that opened its turn."""
+        history = self.history
+        while index > 0 and not (
+            isinstance(history[index], ModelRequest)
+            and any(isinstance(part, UserPromptPart) for part in history[index].parts)
+        ):
+            index -= 1
+        return index
+
+    def _history_widgets(self, start: int, stop: int) -> list:
+        """Build the widgets for history[start:stop]."""
+        prefix = self._user_prefix
+        widgets = []
+        for idx in range(start, stop):
+            msg = self.history[idx]
             if isinstance(msg, ModelRequest):
                 for part in msg.parts:
                     if isinstance(part, UserPromptPart):
-                        accent = self._theme.colors["accent"]
-                        widget = Static(f"[{accent}]┃[/] {part.content}", classes="user-message")
+                        widget = Static(f"{prefix}{part.content}", classes="user-message")
                         widget.history_index = idx
                         widget.original_content = part.content
-                        await container.mount(widget)
+                        widgets.append(widget)
                     elif isinstance(part, ToolReturnPart):
-                        await container.mount(format_tool_result(part.content))
+                        widgets.append(format_tool_result(part.content))
             elif isinstance(msg, ModelResponse):
                 for part in msg.parts:
                     if isinstance(part, ToolCallPart):
-                        await container.mount(format_tool_call(part))
+                        widgets.append(format_tool_call(part))
                     elif isinstance(part, TextPart):
-                        widget = Markdown(f"╰ {part.content}", classes="agent-message")
+                        widget = Markdown(
+                            f"╰ {part.content}", classes="agent-message", parser_factory=_markdown_parser
+                        )
                         widget.copyable_content = part.content
-                        await container.mount(widget)
-        container.scroll_end()
+                        widgets.append(widget)
+        return widgets
 
     async def on_input_submitted(self, event: Input.Submitted) -> None:
         """Handle Enter in single-line input mode."""
         prompt = event.value.strip()
         if prompt:
-            self.query_one("#prompt-single", Input).value = ""
+            self._prompt_single.value = ""
             await self._submit_prompt(prompt)
 
     async def action_submit(self) -> None:
         """Handle Ctrl+J in multi-line input mode."""
         if not self.multiline_mode:
             return
-        textarea = self.query_one("#prompt-multi", TextArea)
+        textarea = self._prompt_multi
         prompt = textarea.text.strip()
         if prompt:
             textarea.text = ""
@@ -468,8 +787,8 @@ class VirtualAgentApp(App):
     def _switch_to_multiline(self, content: str) -> None:
         """Switch to multi-line TextArea mode."""
         self.multiline_mode = True
-        self.query_one("#prompt-single", Input).add_class("hidden")
-        textarea = self.query_one("#prompt-multi", TextArea)
+        self._prompt_single.add_class("hidden")
+        textarea = self._prompt_multi
         textarea.remove_class("hidden")
         textarea.border_subtitle = "Ctrl+J to send"
         textarea.text = content
@@ -478,21 +797,21 @@ class VirtualAgentApp(App):
     def _switch_to_single_line(self) -> None:
         """Switch back to single-line Input mode."""
         self.multiline_mode = False
-        textarea = self.query_one("#prompt-multi", TextArea)
+        textarea = self._prompt_multi
         textarea.add_class("hidden")
         textarea.border_subtitle = ""
-        input_widget = self.query_one("#prompt-single", Input)
+        input_widget = self._prompt_single
         input_widget.remove_class("hidden")
         input_widget.focus()
 
     async def _submit_prompt(self, prompt: str) -> None:
         """Shared submission logic for both input modes."""
-        messages = self.query_one("#messages", VerticalScroll)
+        messages = self._messages_view
 
         if prompt.startswith("/"):
             result = await dispatch(self, prompt)
             if result:
-                await messages.mount(Markdown(result, classes="agent-message"))
+                await messages.mount(Markdown(result, classes="agent-message", parser_factory=_markdown_parser))
                 messages.scroll_end()
             return
 
@@ -504,18 +823,17 @@ class VirtualAgentApp(App):
 
         # Disable current input
         if self.multiline_mode:
-            self.query_one("#prompt-multi", TextArea).disabled = True
+            self._prompt_multi.disabled = True
         else:
-            self.query_one("#prompt-single", Input).disabled = True
+            self._prompt_single.disabled = True
 
-        accent = self._theme.colors["accent"]
-        user_msg = Static(f"[{accent}]┃[/] {prompt}", classes="user-message")
+        user_msg = Static(self._user_prefix + prompt, classes="user-message")
         user_msg.history_index = len(self.history)  # Index BEFORE this turn
         user_msg.original_content = prompt
         await messages.mount(user_msg)
         messages.scroll_end()
 
-        response = Markdown("", classes="agent-message")
+        response = Markdown("", classes="agent-message", parser_factory=_streaming_markdown_parser)
         await messages.mount(response)
 
         self._set_thinking(True)
@@ -529,11 +847,35 @@ class VirtualAgentApp(App):
 
         # Re-enable current input
         if self.multiline_mode:
-            self.query_one("#prompt-multi", TextArea).disabled = False
-            self.query_one("#prompt-multi", TextArea).focus()
+            self._prompt_multi.disabled = False
+            self._prompt_multi.focus()
         else:
-            self.query_one("#prompt-single", Input).disabled = False
-            self.query_one("#prompt-single", Input).focus()
+            self._prompt_single.disabled = False
+            self._prompt_single.focus()
+
+    async def _stream_reply(
+        self,
+        node: ModelRequestNode,
+        ctx,
+        response_widget: Markdown,
+        container: VerticalScroll,
+    ) -> None:
+        """Stream one model response's text into the response widget as it arrives."""
+        await response_widget.update("╰ ")  # Each response replaces the previous step's text
+        # Textual's stream batches fragments that arrive faster than they can be rendered
+        stream = Markdown.get_stream(response_widget)
+        try:
+            async with node.stream(ctx) as events:
+                async for event in events:
+                    if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart):
+                        await stream.write(event.part.content)
+                    elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+                        await stream.write(event.delta.content_delta)
+                    else:
+                        continue
+                    container.scroll_end(animate=False)
+        finally:
+            await stream.stop()
 
     async def _run_agent(
         self,
@@ -545,35 +887,49 @@ class VirtualAgentApp(App):
         async with self.agent.iter(
             prompt,
             deps=self.deps,
-            message_history=self.history,
+            message_history=window_history(self.history),
             usage_limits=UsageLimits(request_limit=10),
         ) as run:
             async for node in run:
+                # One mount (and one layout pass) per node, not per part
                 if isinstance(node, CallToolsNode):
-                    for part in node.model_response.parts:
-                        if isinstance(part, ToolCallPart):
-                            await container.mount(format_tool_call(part), before=response_widget)
-                            container.scroll_end()
+                    widgets = [
+                        format_tool_call(part)
+                        for part in node.model_response.parts
+                        if isinstance(part, ToolCallPart)
+                    ]
                 elif isinstance(node, ModelRequestNode):
-                    for part in node.request.parts:
-                        if isinstance(part, ToolReturnPart):
-                            await container.mount(format_tool_result(part.content), before=response_widget)
-                            container.scroll_end()
-
-            response_widget.update(f"╰ {run.result.output}")
+                    widgets = [
+                        format_tool_result(part.content)
+                        for part in node.request.parts
+                        if isinstance(part, ToolReturnPart)
+                    ]
+                else:
+                    continue
+                if widgets:
+                    await container.mount(*widgets, before=response_widget)
+                    container.scroll_end()
+                if isinstance(node, ModelRequestNode):
+                    await self._stream_reply(node, run.ctx, response_widget, container)
+
+            # Streaming normally leaves the final text in place; only reparse if it differs
+            reply = f"╰ {run.result.output}"
+            if response_widget.source != reply:
+                response_widget.update(reply)
             response_widget.copyable_content = run.result.output
             container.scroll_end()
-            self.history = run.result.all_messages()
+            self.history = [*self.history, *run.result.new_messages()]
         self._check_modified()
 
     async def action_clear(self) -> None:
         """Start a new conversation (saves current one first)."""
         self._persist_conversation()
         # Start new conversation
-        self.conversation_id = str(uuid.uuid4())
+        self.conversation_id = uuid.uuid4().hex
         self.history = []
+        self._persisted_len = self._stored_len = self._rendered_from = 0
 
-        messages = self.query_one("#messages", VerticalScroll)
+        messages = self._messages_view
         await messages.remove_children()
 
     def _set_thinking(self, thinking: bool) -> None:
@@ -590,16 +946,13 @@ class VirtualAgentApp(App):
 
     def _animate_thinking(self) -> None:
         """Cycle through thinking animation frames."""
-        frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-        status = self.query_one("#header-status", Static)
-        dot = frames[self._thinking_frame % len(frames)]
-        accent = self._theme.colors["accent"]
-        status.update(f"[{accent}]{dot}[/] thinking...")
+        frames = self._spinner_frames
+        self._header_status.update(frames[self._thinking_frame % len(frames)])
         self._thinking_frame += 1
 
     def _update_header(self) -> None:
         """Update header status (right side)."""
-        status = self.query_one("#header-status", Static)
+        status = self._header_status
         if self.thinking:
             return  # Animation handles this
         elif self.modified:
@@ -609,25 +962,24 @@ class VirtualAgentApp(App):
 
     def _update_header_title(self) -> None:
         """Update header title with current model."""
-        title = self.query_one("#header-title", Static)
         muted = self._theme.colors["text_muted"]
-        title.update(f"Virtual OS [{muted}]•[/] {self.current_model}")
+        self._header_title.update(f"Virtual OS [{muted}]•[/] {self.current_model}")
 
     def _check_modified(self) -> None:
-        """Check if filesystem differs from snapshot."""
-        self.modified = self.fs.files != self._snapshot
+        """Check if filesystem changed since the last save."""
+        self.modified = self.fs.files.version != self._saved_version
         self._update_header()
 
     async def action_save(self) -> None:
         """Save workspace and conversation to disk."""
         count = self.fs.save_to_disk(self.workspace_path)
-        self._snapshot = dict(self.fs.files)
+        self._saved_version = self.fs.files.version
         self.modified = False
         self._update_header()
 
         self._persist_conversation()
 
-        messages = self.query_one("#messages", VerticalScroll)
+        messages = self._messages_view
         confirm = Static(f"[Saved {count} files to {self.workspace_path}/]", classes="system-message")
         await messages.mount(confirm)
         messages.scroll_end()
@@ -635,9 +987,9 @@ class VirtualAgentApp(App):
     def action_edit(self) -> None:
         """Open external editor for multi-line input."""
         if self.multiline_mode:
-            initial = self.query_one("#prompt-multi", TextArea).text
+            initial = self._prompt_multi.text
         else:
-            initial = self.query_one("#prompt-single", Input).value
+            initial = self._prompt_single.value
 
         with self.suspend():
             content = _open_external_editor(initial)
@@ -645,9 +997,9 @@ class VirtualAgentApp(App):
         if not content:
             # Cancelled or empty - refocus current input
             if self.multiline_mode:
-                self.query_one("#prompt-multi", TextArea).focus()
+                self._prompt_multi.focus()
             else:
-                self.query_one("#prompt-single", Input).focus()
+                self._prompt_single.focus()
             return
 
         if "\n" in content:
@@ -656,7 +1008,7 @@ class VirtualAgentApp(App):
         else:
             # Single-line content - stay in Input mode
             self._switch_to_single_line()
-            self.query_one("#prompt-single", Input).value = content
+            self._prompt_single.value = content
 
     def action_toggle_copy_mode(self) -> None:
         """Toggle copy mode on/off."""
@@ -667,10 +1019,15 @@ class VirtualAgentApp(App):
 
     def _enter_copy_mode(self) -> None:
         """Activate copy mode, highlight copyable blocks."""
-        container = self.query_one("#messages", VerticalScroll)
-        candidates = list(container.query(".tool-result, .agent-message"))
-
-        self._copy_targets = [w for w in candidates if hasattr(w, "copyable_content")][-9:]
+        container = self._messages_view
+        # Walk back from the newest message and stop at 9, instead of querying them all
+        targets = []
+        for widget in reversed(container.children):
+            if not COPY_CLASSES.isdisjoint(widget.classes) and hasattr(widget, "copyable_content"):
+                targets.append(widget)
+                if len(targets) == 9:
+                    break
+        self._copy_targets = targets[::-1]
 
         if not self._copy_targets:
             self._flash_status("No copyable blocks")
@@ -678,9 +1035,9 @@ class VirtualAgentApp(App):
 
         self.copy_mode = True
         if self.multiline_mode:
-            self.query_one("#prompt-multi", TextArea).disabled = True
+            self._prompt_multi.disabled = True
         else:
-            self.query_one("#prompt-single", Input).disabled = True
+            self._prompt_single.disabled = True
 
         for i, widget in enumerate(self._copy_targets, 1):
             widget.add_class("copy-target")
@@ -698,11 +1055,11 @@ class VirtualAgentApp(App):
         self.copy_mode = False
 
         if self.multiline_mode:
-            self.query_one("#prompt-multi", TextArea).disabled = False
-            self.query_one("#prompt-multi", TextArea).focus()
+            self._prompt_multi.disabled = False
+            self._prompt_multi.focus()
         else:
-            self.query_one("#prompt-single", Input).disabled = False
-            self.query_one("#prompt-single", Input).focus()
+            self._prompt_single.disabled = False
+            self._prompt_single.focus()
 
         self._update_header()
 
@@ -711,7 +1068,7 @@ class VirtualAgentApp(App):
         # Copy mode digit selection
         if self.copy_mode:
             if event.key.isdigit() and event.key != "0":
-                self._copy_block(int(event.key))
+                self.call_later(self._copy_block, int(event.key))
                 event.stop()
             return
 
@@ -739,7 +1096,7 @@ class VirtualAgentApp(App):
         if self.multiline_mode or not self.input_history or self.copy_mode:
             return
 
-        input_widget = self.query_one("#prompt-single", Input)
+        input_widget = self._prompt_single
 
         # Save current draft before first navigation
         if self.input_history_idx == -1:
@@ -762,7 +1119,7 @@ class VirtualAgentApp(App):
         if self.multiline_mode or not self.input_history or self.copy_mode:
             return
 
-        input_widget = self.query_one("#prompt-single", Input)
+        input_widget = self._prompt_single
 
         if self.input_history_idx > 0:
             self.input_history_idx -= 1
@@ -776,7 +1133,7 @@ class VirtualAgentApp(App):
 
     def _enter_rewind_mode(self) -> None:
         """Activate rewind mode, highlight user messages."""
-        container = self.query_one("#messages", VerticalScroll)
+        container = self._messages_view
         candidates = list(container.query(".user-message"))
 
         # Filter to widgets with history tracking
@@ -794,7 +1151,7 @@ class VirtualAgentApp(App):
         self.rewind_selection = len(self.rewind_targets) - 1  # Start at most recent
 
         # Disable input
-        self.query_one("#prompt-single", Input).disabled = True
+        self._prompt_single.disabled = True
 
         # Highlight all, mark selected
         for i, (widget, _, _) in enumerate(self.rewind_targets):
@@ -814,8 +1171,8 @@ class VirtualAgentApp(App):
         self.rewind_mode = False
         self.rewind_selection = 0
 
-        self.query_one("#prompt-single", Input).disabled = False
-        self.query_one("#prompt-single", Input).focus()
+        self._prompt_single.disabled = False
+        self._prompt_single.focus()
         self._update_header()
 
     def _rewind_prev(self) -> None:
@@ -840,9 +1197,10 @@ class VirtualAgentApp(App):
 
         # Truncate history to before this message
         self.history = self.history[:history_idx]
+        self._persisted_len = min(self._persisted_len, history_idx)
 
         # Remove UI widgets from this point forward
-        container = self.query_one("#messages", VerticalScroll)
+        container = self._messages_view
         children = list(container.children)
         widget_idx = children.index(widget)
         for child in children[widget_idx:]:
@@ -854,24 +1212,29 @@ class VirtualAgentApp(App):
         if "\n" in content:
             self._switch_to_multiline(content)
         else:
-            self.query_one("#prompt-single", Input).value = content
+            self._prompt_single.value = content
 
         self._flash_status("Rewound")
 
-    def _copy_block(self, index: int) -> None:
+    async def _copy_block(self, index: int) -> None:
         """Copy block at 1-based index."""
+        if not self.copy_mode:
+            return  # Another digit already picked a block
+        content = None
         if 1 <= index <= len(self._copy_targets):
-            widget = self._copy_targets[index - 1]
-            content = widget.copyable_content
-            if _copy_to_clipboard(content):
+            content = self._copy_targets[index - 1].copyable_content
+        self._exit_copy_mode()
+        if content is not None:
+            if await _copy_to_clipboard(content):
                 self._flash_status("Copied")
             else:
-                self._flash_status("Clipboard unavailable")
-        self._exit_copy_mode()
+                # In-process fallback: OSC 52 escape, handled by most terminals
+                self.copy_to_clipboard(content)
+                self._flash_status("Sent to terminal clipboard")
 
     def _update_status(self, text: str) -> None:
         """Update header status text."""
-        status = self.query_one("#header-status", Static)
+        status = self._header_status
         status.update(text)
 
     def _flash_status(self, text: str, duration: float = 1.5) -> None:
@@ -1,23 +1,32 @@
 import asyncio
 import json
+import os
+import re
+import shlex
 import subprocess
 import sys
 from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain, count
 from pathlib import Path
 
-from typing import Literal
+from typing import Container, Literal
 
 from dotenv import load_dotenv
 
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.messages import FunctionToolCallEvent, FunctionToolResultEvent, PartDeltaEvent, ThinkingPartDelta
-from pydantic_ai.models.anthropic import AnthropicModelSettings
-from pydantic_ai.models.google import GoogleModelSettings
-from pydantic_ai.models.openai import OpenAIResponsesModelSettings
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json otherwise
+    orjson = None
 
 load_dotenv()
 
 VIRTUAL_ROOT = "/home/user"
+VIRTUAL_ROOT_PREFIX = VIRTUAL_ROOT + "/"
+DIR_MARKER = ".dir"  # Placeholder file mkdir creates so empty directories exist
 
 MODELS: dict[str, str] = {
     "openai": "openai-responses:gpt-5.1-codex-mini",
@@ -32,50 +41,188 @@ ANTHROPIC_BUDGET = {"low": 1024, "medium": 4096, "high": 16384}
 
 def _build_settings(model_key: str, thinking_effort: ThinkingEffort):
     """Build model-specific settings from unified thinking_effort."""
+    # Provider modules are imported on demand; each pulls in its SDK
     if model_key == "openai":
+        from pydantic_ai.models.openai import OpenAIResponsesModelSettings
         return OpenAIResponsesModelSettings(
             openai_reasoning_summary="detailed",
             openai_reasoning_effort=thinking_effort or "none",
         )
 
     if model_key == "gemini":
+        from pydantic_ai.models.google import GoogleModelSettings
         return GoogleModelSettings(
             google_thinking_config={"thinking_level": thinking_effort or "minimal"}
         )
 
     if model_key == "haiku":
+        from pydantic_ai.models.anthropic import AnthropicModelSettings
+        # SYSTEM_PROMPT and TOOLS never change, so mark them as a cacheable prompt prefix
+        settings = AnthropicModelSettings(
+            anthropic_cache_instructions=True,
+            anthropic_cache_tool_definitions=True,
+        )
         if thinking_effort:
             budget = ANTHROPIC_BUDGET[thinking_effort]
-            return AnthropicModelSettings(
-                max_tokens=budget + 8192,
-                anthropic_thinking={"type": "enabled", "budget_tokens": budget}
-            )
-        return None
+            settings["max_tokens"] = budget + 8192
+            settings["anthropic_thinking"] = {"type": "enabled", "budget_tokens": budget}
+        return settings
 
     return None
 
 
+@lru_cache(maxsize=512)
+def _normalize_path(base: str, path: str) -> str:
+    """Join `path` onto `base` and collapse ".", ".." and empty segments."""
+    parts = []
+    for part in chain(base.split("/"), path.split("/")):
+        if part == "..":
+            if parts:
+                parts.pop()
+        elif part and part != ".":
+            parts.append(part)
+    # Interned so repeated lookups of the same path hit the identity fast path
+    return sys.intern("/" + "/".join(parts))
+
+
+# Shared across tables, so a replaced `fs.files` never repeats a version seen before
+_VERSIONS = count()
+
+
+class FileTable(dict):
+    """Path -> content dict that bumps `version` on every mutation.
+
+    Also indexes each directory's direct children so listings don't scan every path,
+    and tracks mkdir's `.dir` marker files so they can be skipped by lookup.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.version = next(_VERSIONS)
+        self.children: dict[str, set[str]] = {}
+        self.dir_markers: set[str] = set()
+        self._sorted: list[str] = []
+        self._sorted_version = -1
+        self.update(*args, **kwargs)
+
+    def _link(self, path: str) -> None:
+        parent, _, name = path.rpartition("/")
+        self.children.setdefault(parent or "/", set()).add(name)
+        if name == DIR_MARKER:
+            self.dir_markers.add(path)
+
+    def _unlink(self, path: str) -> None:
+        parent, _, name = path.rpartition("/")
+        parent = parent or "/"
+        if name == DIR_MARKER:
+            self.dir_markers.discard(path)
+        names = self.children[parent]
+        names.discard(name)
+        if not names:
+            del self.children[parent]
+
+    def __setitem__(self, path: str, content: str) -> None:
+        if path not in self:
+            self._link(path)
+        super().__setitem__(path, content)
+        self.version = next(_VERSIONS)
+
+    def __delitem__(self, path: str) -> None:
+        super().__delitem__(path)
+        self._unlink(path)
+        self.version = next(_VERSIONS)
+
+    def pop(self, path: str, *default):
+        if path in self:
+            self._unlink(path)
+            self.version = next(_VERSIONS)
+        return super().pop(path, *default)
+
+    def popitem(self) -> tuple[str, str]:
+        path, content = super().popitem()
+        self._unlink(path)
+        self.version = next(_VERSIONS)
+        return path, content
+
+    def setdefault(self, path: str, default: str = "") -> str:
+        if path not in self:
+            self[path] = default
+        return super().__getitem__(path)
+
+    def update(self, *args, **kwargs) -> None:
+        # A lone dict (the bulk-load case) is merged directly without a copy
+        if len(args) == 1 and not kwargs and type(args[0]) is dict:
+            items = args[0]
+        else:
+            items = dict(*args, **kwargs)
+        for path in items:
+            if path not in self:
+                self._link(path)
+        super().update(items)
+        self.version = next(_VERSIONS)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.children.clear()
+        self.dir_markers.clear()
+        self.version = next(_VERSIONS)
+
+    def sorted_paths(self) -> list[str]:
+        """All paths in sorted order, re-sorted only after a mutation."""
+        if self._sorted_version != self.version:
+            self._sorted = sorted(self)
+            self._sorted_version = self.version
+        return self._sorted
+
+    def files_under(self, top: str) -> list[str]:
+        """Sorted paths of the files in directory `top` and below, without dir markers."""
+        prefix = top.rstrip("/") + "/"
+        paths = []
+        for parent, names in self.children.items():
+            if parent == top or parent.startswith(prefix):
+                base = parent.rstrip("/") + "/"
+                paths.extend(base + name for name in names if name != DIR_MARKER)
+        paths.sort()
+        return paths
+
+
+def _mtime_ns(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 @dataclass
 class VirtualFileSystem:
     """In-memory filesystem. Data is lost when the script ends."""
 
-    files: dict[str, str] = field(default_factory=dict)
+    files: FileTable = field(default_factory=FileTable)
     cwd: str = VIRTUAL_ROOT
+    # Host path -> (content, mtime_ns) as last loaded or saved, so unchanged files aren't rewritten
+    _synced: dict[str, tuple[str, int]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value) -> None:
+        # Any mapping assigned to `files` (at init or later) is wrapped so the index is kept
+        if name == "files" and not isinstance(value, FileTable):
+            value = FileTable(value)
+        super().__setattr__(name, value)
+
+    def sorted_paths(self) -> list[str]:
+        """All paths in sorted order, re-sorted only after the files change."""
+        return self.files.sorted_paths()
 
     def _resolve(self, path: str) -> str:
-        if path.startswith("/"):
-            resolved = path
-        else:
-            resolved = f"{self.cwd.rstrip('/')}/{path}"
-        # Normalize . and ..
-        parts = []
-        for part in resolved.split("/"):
-            if part == "..":
-                if parts:
-                    parts.pop()
-            elif part and part != ".":
-                parts.append(part)
-        return "/" + "/".join(parts)
+        # Fast path: no ".", ".." or empty segments, so only cwd needs joining
+        if path and path[0] != "." and path[-1] != "/" and "/." not in path and "//" not in path:
+            if path[0] == "/":
+                return sys.intern(path)
+            return sys.intern(f"{self.cwd.rstrip('/')}/{path}")
+        return _normalize_path("" if path.startswith("/") else self.cwd, path)
 
     def write(self, path: str, content: str) -> str:
         full_path = self._resolve(path)
@@ -89,16 +236,11 @@ class VirtualFileSystem:
         return self.files[full_path]
 
     def list_dir(self, path: str = ".") -> str:
-        target_dir = self._resolve(path)
-        matches = []
-        for file_path in self.files:
-            if file_path.startswith(target_dir):
-                relative = file_path[len(target_dir) :].lstrip("/")
-                if "/" not in relative:
-                    matches.append(relative)
-        if not matches:
+        names = self.files.children.get(self._resolve(path), ())
+        listing = sorted(name for name in names if name != DIR_MARKER)
+        if not listing:
             return "(empty directory)"
-        return "\n".join(matches)
+        return "\n".join(listing)
 
     def delete(self, path: str) -> str:
         full_path = self._resolve(path)
@@ -107,39 +249,59 @@ class VirtualFileSystem:
             return f"Deleted {full_path}"
         return f"Error: File {full_path} not found"
 
-    def load_from_disk(self, host_path: Path, virtual_root: str = VIRTUAL_ROOT) -> int:
-        """Load files from host folder into virtual filesystem. Returns count."""
-        count = 0
-        if not host_path.exists():
-            return count
-        for file in host_path.rglob("*"):
-            if file.is_file():
+    def load_from_disk(
+        self, host_path: Path, virtual_root: str = VIRTUAL_ROOT, exclude: Container[str] = ()
+    ) -> int:
+        """Load files from host folder into virtual filesystem. Returns count.
+
+        Top-level entries named in `exclude` are skipped.
+        """
+        base = str(host_path)
+        loaded = {}
+        for root, dirs, names in os.walk(base):
+            if exclude and root == base:
+                dirs[:] = [d for d in dirs if d not in exclude]
+                names = [n for n in names if n not in exclude]
+            prefix = virtual_root + root[len(base):].replace(os.sep, "/")
+            for name in names:
+                target = os.path.join(root, name)
                 try:
-                    content = file.read_text()
-                    relative = file.relative_to(host_path)
-                    virtual_path = f"{virtual_root}/{relative}"
-                    self.files[virtual_path] = content
-                    count += 1
+                    with open(target, "rb") as fp:
+                        content = fp.read().decode("utf-8")
+                        self._synced[target] = (content, os.fstat(fp.fileno()).st_mtime_ns)
                 except (UnicodeDecodeError, PermissionError):
-                    pass
-        return count
+                    continue
+                loaded[f"{prefix}/{name}"] = content
+        self.files.update(loaded)
+        return len(loaded)
 
     def save_to_disk(self, host_path: Path, virtual_root: str = VIRTUAL_ROOT) -> int:
-        """Save virtual files back to host folder. Returns count."""
-        count = 0
+        """Save virtual files back to host folder. Returns count.
+
+        Files whose content and on-disk mtime match the last load or save are skipped.
+        """
         host_path.mkdir(parents=True, exist_ok=True)
+        saved = 0
+        changed = []
         for virtual_path, content in self.files.items():
             if virtual_path.startswith(virtual_root):
                 relative = virtual_path[len(virtual_root):].lstrip("/")
                 if relative:
-                    target = host_path / relative
-                    target.parent.mkdir(parents=True, exist_ok=True)
-                    target.write_text(content)
-                    count += 1
-        return count
-
-
-@dataclass
+                    target = os.path.join(host_path, relative)
+                    saved += 1
+                    synced = self._synced.get(target)
+                    if synced is None or synced[0] != content or _mtime_ns(target) != synced[1]:
+                        changed.append((target, content))
+        for parent in {os.path.dirname(target) for target, _ in changed}:
+            os.makedirs(parent, exist_ok=True)
+        for target, content in changed:
+            with open(target, "wb") as fp:
+                fp.write(content.encode("utf-8"))
+            self._synced[target] = (content, os.stat(target).st_mtime_ns)
+        return saved
+
+
+@dataclass(slots=True)
 class AgentDeps:
     fs: VirtualFileSystem
     user_name: str
@@ -213,148 +375,279 @@ def read_file(ctx: RunContext[AgentDeps], path: str) -> str:
     return ctx.deps.fs.read(path)
 
 
-def run_shell(ctx: RunContext[AgentDeps], command: str) -> str:
-    """
-    Execute a shell command. Use write_file/read_file for file operations.
-    Supported: ls, rm, pwd, cd, mkdir, touch, mv, grep, python.
-    Note: grep patterns with spaces require regex (e.g., hello\\s+world).
+_REGEX_METACHARS = frozenset(".^$*+?()[]{}|\\")
+# String anchors and lookarounds see the whole buffer, not one line, in a buffer sweep
+_WHOLE_STRING_SYNTAX = re.compile(r"\\[AZ]|\(\?<?[=!]")
+
+
+@lru_cache(maxsize=128)
+def _compile_grep(pattern: str) -> re.Pattern:
+    # MULTILINE so ^/$ anchor at line boundaries when scanning a whole file
+    return re.compile(pattern, re.MULTILINE)
+
+
+def _grep_match_lines(regex: re.Pattern, content: str) -> list[tuple[int, int]]:
+    """(0-based line index, line start offset) of matching lines, from one sweep of the buffer."""
+    matched = []
+    lineno = line_start = pos = 0
+    end = len(content)
+    while pos <= end:
+        m = regex.search(content, pos)
+        if m is None:
+            break
+        start = m.start()
+        lineno += content.count("\n", line_start, start)
+        nl = content.rfind("\n", line_start, start)
+        if nl != -1:
+            line_start = nl + 1
+        line_end = content.find("\n", start)
+        if line_end == -1:
+            line_end = end
+        # A match spilling into the next line must be re-checked within its own line
+        if m.end() <= line_end or regex.search(content, line_start, line_end):
+            matched.append((lineno, line_start))
+        pos = line_end + 1
+    return matched
+
+
+def _grep_each_line(regex: re.Pattern, content: str) -> list[tuple[int, int]]:
+    """Same as _grep_match_lines, searching each line as its own string."""
+    matched = []
+    line_start = 0
+    for i, line in enumerate(content.split("\n")):
+        if regex.search(line):
+            matched.append((i, line_start))
+        line_start += len(line) + 1
+    return matched
+
+
+def _grep_literal_lines(needle: str, content: str) -> list[tuple[int, int]]:
+    """Same as _grep_match_lines for a pattern without regex metacharacters."""
+    matched = []
+    lineno = pos = 0
+    while (idx := content.find(needle, pos)) != -1:
+        lineno += content.count("\n", pos, idx)
+        matched.append((lineno, content.rfind("\n", pos, idx) + 1 or pos))
+        pos = content.find("\n", idx)
+        if pos == -1:
+            break
+        pos += 1
+        lineno += 1
+    return matched
+
+
+def _grep_format(
+    filepath: str, content: str, matched: list[tuple[int, int]], before: int, after: int
+) -> list[str]:
+    """Matched lines plus context as grep output, "--" between gaps.
+
+    Lines are sliced out of content on demand, so only output lines are materialized.
     """
+    out = []
+    matched_set = {i for i, _ in matched}
+    prev_idx = -2
+    next_pos = 0  # Start offset of line prev_idx + 1
+    for i, line_start in matched:
+        first = max(0, i - before, prev_idx + 1)
+        last = i + after
+        if first > last or next_pos == -1:
+            continue
+        if first == prev_idx + 1:
+            pos = next_pos
+        else:
+            pos = line_start
+            for _ in range(i - first):
+                pos = content.rfind("\n", 0, pos - 1) + 1
+            if prev_idx >= 0:
+                out.append("--")
+        for idx in range(first, last + 1):
+            end = content.find("\n", pos)
+            line = content[pos:] if end == -1 else content[pos:end]
+            marker = ":" if idx in matched_set else "-"
+            out.append(f"{filepath}:{idx + 1}{marker}{line}")
+            prev_idx = idx
+            if end == -1:
+                next_pos = -1
+                break
+            pos = next_pos = end + 1
+    return out
+
+
+def _shell_ls(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    return ctx.deps.fs.list_dir(args[0] if args else ".")
+
+
+def _shell_pwd(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    return ctx.deps.fs.cwd
+
+
+def _shell_cd(ctx: RunContext[AgentDeps], args: list[str]) -> str:
     fs = ctx.deps.fs
-    parts = command.split(" ", 1)
-    cmd = parts[0]
-    arg = parts[1] if len(parts) > 1 else ""
-
-    if cmd == "ls":
-        return fs.list_dir(arg or ".")
-
-    if cmd == "pwd":
-        return fs.cwd
-
-    if cmd == "cd":
-        fs.cwd = fs._resolve(arg or ".")
-        return f"Changed directory to {fs.cwd}"
-
-    if cmd == "rm":
-        return fs.delete(arg)
-
-    if cmd == "mkdir":
-        if not arg:
-            return "Error: mkdir requires a directory path."
-        dir_path = fs._resolve(arg)
-        marker = f"{dir_path}/.dir"
-        if marker not in fs.files:
-            fs.files[marker] = ""
-        return f"Created directory {dir_path}"
-
-    if cmd == "touch":
-        if not arg:
-            return "Error: touch requires a file path."
-        full_path = fs._resolve(arg)
-        if full_path not in fs.files:
-            fs.files[full_path] = ""
-        return f"Touched {full_path}"
-
-    if cmd == "mv":
-        args = arg.split()
-        if len(args) != 2:
-            return "Error: mv requires source and destination paths."
-        src, dst = args
-        src_path = fs._resolve(src)
-        if src_path not in fs.files:
-            return f"Error: Source {src_path} does not exist."
-        content = fs.files[src_path]
-        dst_path = fs._resolve(dst)
-        fs.files[dst_path] = content
-        del fs.files[src_path]
-        return f"Moved {src_path} to {dst_path}"
-
-    if cmd == "grep":
-        import re
-        # Parse flags: -A NUM, -B NUM
-        tokens = arg.split()
-        after_ctx = before_ctx = 0
-        while tokens and tokens[0].startswith("-"):
-            flag = tokens.pop(0)
-            if flag in ("-A", "-B") and tokens:
-                try:
-                    val = int(tokens.pop(0))
-                    if flag == "-A":
-                        after_ctx = val
-                    else:
-                        before_ctx = val
-                except ValueError:
-                    return f"Error: {flag} requires a number"
-            else:
-                return f"Error: Unknown flag {flag}. Usage: grep [-A NUM] [-B NUM] PATTERN [PATH]"
-
-        if not tokens:
-            return "Usage: grep [-A NUM] [-B NUM] PATTERN [PATH]"
-        pattern = tokens[0]
-        target = fs._resolve(tokens[1] if len(tokens) > 1 else ".")
+    fs.cwd = fs._resolve(args[0] if args else ".")
+    return f"Changed directory to {fs.cwd}"
+
+
+def _shell_rm(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    return ctx.deps.fs.delete(args[0] if args else "")
+
+
+def _shell_mkdir(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    fs = ctx.deps.fs
+    if not args:
+        return "Error: mkdir requires a directory path."
+    dir_path = fs._resolve(args[0])
+    marker = f"{dir_path}/{DIR_MARKER}"
+    if marker not in fs.files:
+        fs.files[marker] = ""
+    return f"Created directory {dir_path}"
+
+
+def _shell_touch(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    fs = ctx.deps.fs
+    if not args:
+        return "Error: touch requires a file path."
+    full_path = fs._resolve(args[0])
+    if full_path not in fs.files:
+        fs.files[full_path] = ""
+    return f"Touched {full_path}"
 
+
+def _shell_mv(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    fs = ctx.deps.fs
+    if len(args) != 2:
+        return "Error: mv requires source and destination paths."
+    src, dst = args
+    src_path = fs._resolve(src)
+    if src_path not in fs.files:
+        return f"Error: Source {src_path} does not exist."
+    content = fs.files[src_path]
+    dst_path = fs._resolve(dst)
+    fs.files[dst_path] = content
+    del fs.files[src_path]
+    return f"Moved {src_path} to {dst_path}"
+
+
+def _shell_grep(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    fs = ctx.deps.fs
+    # Parse flags: -A NUM, -B NUM
+    after_ctx = before_ctx = 0
+    i = 0
+    while i < len(args) and args[i].startswith("-"):
+        flag = args[i]
+        if flag in ("-A", "-B") and i + 1 < len(args):
+            try:
+                val = int(args[i + 1])
+                if flag == "-A":
+                    after_ctx = val
+                else:
+                    before_ctx = val
+            except ValueError:
+                return f"Error: {flag} requires a number"
+            i += 2
+        else:
+            return f"Error: Unknown flag {flag}. Usage: grep [-A NUM] [-B NUM] PATTERN [PATH]"
+
+    if i == len(args):
+        return "Usage: grep [-A NUM] [-B NUM] PATTERN [PATH]"
+    pattern = args[i]
+    target = fs._resolve(args[i + 1] if i + 1 < len(args) else ".")
+
+    # Literal patterns skip the regex engine and use str.find
+    literal = _REGEX_METACHARS.isdisjoint(pattern)
+    if not literal:
         try:
-            regex = re.compile(pattern)
+            regex = _compile_grep(pattern)
         except re.error as e:
             return f"Error: Invalid regex pattern: {e}"
+    per_line = not literal and _WHOLE_STRING_SYNTAX.search(pattern) is not None
 
-        results = []
-        for filepath, content in fs.files.items():
-            if filepath.endswith("/.dir"):
-                continue
-            if not filepath.startswith(target):
-                continue
-            if target in fs.files and filepath != target:
-                continue
-
-            lines = content.split("\n")
-            matched_ranges = set()
-
-            # Find all matching line indices and their context ranges
-            for i, line in enumerate(lines):
-                if regex.search(line):
-                    start = max(0, i - before_ctx)
-                    end = min(len(lines), i + after_ctx + 1)
-                    for j in range(start, end):
-                        matched_ranges.add((j, j == i))
-
-            # Output lines in order, marking matches
-            prev_idx = -2
-            for idx in sorted(set(j for j, _ in matched_ranges)):
-                is_match = any(m for j, m in matched_ranges if j == idx)
-                if idx > prev_idx + 1 and prev_idx >= 0:
-                    results.append("--")
-                marker = ":" if is_match else "-"
-                results.append(f"{filepath}:{idx + 1}{marker}{lines[idx]}")
-                prev_idx = idx
-
-        if not results:
-            return "No matches found."
-        if len(results) > 100:
-            return f"Found {len(results)} lines (showing first 100):\n" + "\n".join(results[:100])
-        return "\n".join(results)
-
-    if cmd == "python":
-        workspace = ctx.deps.workspace_path
-        if not workspace:
-            return "Error: No workspace configured for Python execution."
-        fs.save_to_disk(workspace)
-        script_path = arg
-        if script_path.startswith(VIRTUAL_ROOT + "/"):
-            script_path = script_path[len(VIRTUAL_ROOT) + 1:]
-        try:
-            result = subprocess.run(
-                ["python", script_path],
-                cwd=workspace,
-                capture_output=True,
-                timeout=30,
-                text=True,
-            )
-            output = result.stdout + result.stderr
-            return output.strip() if output.strip() else "(no output)"
-        except subprocess.TimeoutExpired:
-            return "Error: Execution timed out (30s limit)."
+    # Only the target file, or the files under the target directory, are visited
+    if target in fs.files:
+        paths = [] if target in fs.files.dir_markers else [target]
+    else:
+        paths = fs.files.files_under(target)
+
+    results = []
+    for filepath in paths:
+        content = fs.files[filepath]
+        if literal:
+            matched = _grep_literal_lines(pattern, content)
+        elif per_line:
+            matched = _grep_each_line(regex, content)
+        else:
+            matched = _grep_match_lines(regex, content)
+        if not matched:
+            continue
+
+        results.extend(_grep_format(filepath, content, matched, before_ctx, after_ctx))
+
+    if not results:
+        return "No matches found."
+    if len(results) > 100:
+        return f"Found {len(results)} lines (showing first 100):\n" + "\n".join(results[:100])
+    return "\n".join(results)
+
+
+def _shell_python(ctx: RunContext[AgentDeps], args: list[str]) -> str:
+    fs = ctx.deps.fs
+    workspace = ctx.deps.workspace_path
+    if not workspace:
+        return "Error: No workspace configured for Python execution."
+    fs.save_to_disk(workspace)
+    script_path = (args[0] if args else "").removeprefix(VIRTUAL_ROOT_PREFIX)
+    try:
+        result = subprocess.run(
+            ["python", script_path, *args[1:]],
+            cwd=workspace,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=30,
+            text=True,
+        )
+        output = result.stdout.strip()
+        return output or "(no output)"
+    except subprocess.TimeoutExpired:
+        return "Error: Execution timed out (30s limit)."
+
+
+@lru_cache(maxsize=256)
+def _split_command(command: str) -> tuple[str, ...]:
+    """Shell-style split honoring quotes; backslashes are kept for regexes."""
+    lexer = shlex.shlex(command, posix=True)
+    lexer.whitespace_split = True
+    lexer.escape = ""
+    lexer.commenters = ""  # "#" is literal in patterns and filenames
+    try:
+        return tuple(lexer)
+    except ValueError:  # Unbalanced quotes
+        return tuple(command.split())
+
+
+SHELL_COMMANDS = {
+    "ls": _shell_ls,
+    "pwd": _shell_pwd,
+    "cd": _shell_cd,
+    "rm": _shell_rm,
+    "mkdir": _shell_mkdir,
+    "touch": _shell_touch,
+    "mv": _shell_mv,
+    "grep": _shell_grep,
+    "python": _shell_python,
+}
 
-    return f"Error: Command '{cmd}' not implemented in virtual sandbox."
+
+def run_shell(ctx: RunContext[AgentDeps], command: str) -> str:
+    """
+    Execute a shell command. Use write_file/read_file for file operations.
+    Supported: ls, rm, pwd, cd, mkdir, touch, mv, grep, python.
+    Quote arguments containing spaces (e.g., grep "hello world").
+    """
+    tokens = _split_command(command)
+    cmd = tokens[0] if tokens else ""
+    handler = SHELL_COMMANDS.get(cmd)
+    if handler is None:
+        return f"Error: Command '{cmd}' not implemented in virtual sandbox."
+    return handler(ctx, list(tokens[1:]))
 
 
 # ─────────────────────────────────────────────────────────────
@@ -392,12 +685,9 @@ def create_agent(
     )
 
 
-agent = create_agent()
-
-
 def _format_args(args: dict | str, max_len: int = 60) -> str:
     if isinstance(args, str):
-        args = json.loads(args)
+        args = orjson.loads(args) if orjson is not None else json.loads(args)
     result = ", ".join(f"{k}={v!r}" for k, v in args.items())
     return result[:max_len] + "..." if len(result) > max_len else result
 
@@ -407,7 +697,7 @@ def _truncate(text: str, max_len: int) -> str:
     return text[:max_len] + "..." if len(text) > max_len else text
 
 
-async def run_streaming(prompt: str, deps: AgentDeps) -> None:
+async def run_streaming(agent: Agent[AgentDeps], prompt: str, deps: AgentDeps) -> None:
     """Run agent with streaming output to terminal."""
     tool_calls = 0
     steps = 0
@@ -434,7 +724,7 @@ async def run_streaming(prompt: str, deps: AgentDeps) -> None:
                 print(f"\n[{steps} steps, {tool_calls} tool calls]")
 
 
-async def run_blocking(prompt: str, deps: AgentDeps) -> None:
+async def run_blocking(agent: Agent[AgentDeps], prompt: str, deps: AgentDeps) -> None:
     """Run agent without streaming (for piped output)."""
     result = await agent.run(prompt, deps=deps)
     print(result.output)
@@ -451,11 +741,12 @@ async def main():
     workspace = Path("./workspace")
     fs.load_from_disk(workspace)
     deps = AgentDeps(fs=fs, user_name="user", workspace_path=workspace)
+    agent = create_agent()
 
     if sys.stdout.isatty():
-        await run_streaming(prompt, deps)
+        await run_streaming(agent, prompt, deps)
     else:
-        await run_blocking(prompt, deps)
+        await run_blocking(agent, prompt, deps)
 
 
 if __name__ == "__main__":